@@ -1,94 +1,173 @@
 import sys
 import os
 import logging
-from faster_whisper import WhisperModel
-from translation import Translation
+from translation import Translation, TranslationMemory
 from PyQt6.QtWidgets import QApplication, QDialog, QMessageBox
+from PyQt6.QtCore import QSettings, QTimer
 from app_window import AppWindow
 from model_selection_dialog import ModelSelectionDialog
 from loading_dialog import LoadingDialog
-from utils import resource_path
+from model_loader_thread import ModelLoaderThread
+from service_client import ServiceClient, ServiceError
+import model_registry
+import inference_tuning
 
 
 class App:
-    def __init__(self):
+    def __init__(self, profiler=None, service_url=None):
+        self.profiler = profiler
+        self.service_url = service_url
         self.app = QApplication(sys.argv)
         self.model_dialog = ModelSelectionDialog(self.available_transcribe_models())
+        self.model_dialog.calibration_started.connect(self.drop_preloaded_model)
         self.loading_dialog = LoadingDialog()
+        self.settings = QSettings("tr-tr", "TrTr")
         self.window = None
         self.loader_thread = None
+        self.pending_model_path = None
+        self.loaded_model = None
+        self.loader_error = None
+        self.model_requested = False
 
     def available_transcribe_models(self):
-        models_meta = {
-            "Systran": [
-                ("tiny ~ 1.5 Гб - самый быстрый ", "faster-whisper-tiny"),
-                ("smallest ~ 2 Гб - быстрый ", "faster-whisper-base"),
-                ("small ~ 3 Гб - скорость + качество", "faster-whisper-small"),
-                ("medium ~ 4 Гб - качество", "faster-whisper-medium"),
-                ("large v2 ~ 5 Гб - лучшее качество ", "faster-whisper-large-v2")
-            ]
-        }
-        return {
-            provider: [
-                (desc, os.path.join(resource_path('repo'), provider, name))
-                for desc, name in models
-                if name in os.listdir(os.path.join(resource_path('repo'), provider))
-            ]
-            for provider, models in models_meta.items()
-        }
+        return model_registry.available_transcribe_models()
 
     def available_translate_models(self, provider='Helsinki-NLP'):
-        model_paths = {}
-        for m in os.listdir(os.path.join(resource_path('repo'), provider)):
-            from_lang, to_lang = m.split('-', maxsplit=1)
-            model_paths[(from_lang, to_lang)] = os.path.join(resource_path('repo'), provider, m)
-        return model_paths
+        return model_registry.available_translate_models(provider)
 
     def run(self):
+        if self.service_url:
+            return self.run_client()
+
+        # пока открыт диалог выбора, заранее загружаем модель из прошлого запуска
+        last_model_path = self.settings.value('transcribe_model_path', '')
+        if last_model_path and self.model_dialog.select_model(last_model_path):
+            logging.info(f"Speculative preload of last used model: {last_model_path}")
+            self.start_loading(last_model_path)
+
+        if self.profiler is not None:
+            QTimer.singleShot(0, self.on_first_window_shown)
+
         if self.model_dialog.exec() == QDialog.DialogCode.Accepted:
             provider, selected_model_path = self.model_dialog.get_selected_model()
             logging.info(f"Selected model: {provider}/{os.path.basename(selected_model_path)}")
+            self.settings.setValue('transcribe_model_path', selected_model_path)
             self.load_model(selected_model_path)
-            #self.on_model_loaded(None)
             self.app.exec()
         else:
             logging.info("Application cancelled by user")
             sys.exit(0)
 
+    def run_client(self):
+        # модели держит локальный сервис, окну загружать их не нужно
+        service_client = ServiceClient(self.service_url)
+        try:
+            service_client.jobs()
+        except ServiceError as e:
+            self.on_model_error(f"Не удалось подключиться к сервису:\n{e}")
+
+        logging.info(f"Connected to transcription service {self.service_url}")
+        self.window = AppWindow(None, None, service_client)
+        self.window.show()
+        if self.profiler is not None:
+            self.profiler.mark('main_window')
+        self.app.exec()
+
+    def on_first_window_shown(self):
+        self.profiler.mark('first_window')
+        self.profiler.report()
+
+    def inference_settings(self, model_path):
+        return inference_tuning.resolve_settings(model_path, **self.model_dialog.inference_overrides())
+
+    def start_loading(self, model_path):
+        if self.loader_thread is not None and self.loader_thread.isRunning():
+            # загрузку весов не прервать: дожидаемся спекулятивной загрузки и
+            # отбрасываем ее модель, чтобы в памяти не оказалось двух моделей
+            if self.pending_model_path is None:
+                self.loader_thread.finished.connect(self.start_pending_loading)
+            self.pending_model_path = model_path
+            self.loading_dialog.update_message("Ожидание предыдущей загрузки...", "")
+            return
+
+        settings = self.inference_settings(model_path)
+        logging.info(f"Inference settings for {os.path.basename(model_path)}: {settings}")
+
+        self.loaded_model = None
+        self.loader_error = None
+        self.loader_thread = ModelLoaderThread(model_path, **settings)
+        self.loader_thread.progress_signal.connect(self.loading_dialog.update_message)
+        self.loader_thread.finished_signal.connect(
+            lambda model, thread=self.loader_thread: self.on_loader_finished(thread, model)
+        )
+        self.loader_thread.error_signal.connect(
+            lambda error, thread=self.loader_thread: self.on_loader_error(thread, error)
+        )
+        self.loader_thread.start()
+        if not self.model_requested:
+            self.model_dialog.set_preload_thread(self.loader_thread)
+
     def load_model(self, model_path):
-        #self.loading_dialog.show()
-        #self.app.processEvents()
         logging.info(f"load_model {model_path}...")
+        self.model_requested = True
 
         if not os.path.exists(model_path):
             self.on_model_error(
                 f"Отсутствует модель распознавания:\n{model_path}"
             )
 
-        try:
-            transcribe_model = WhisperModel(
-                model_size_or_path=model_path,
-                device='cpu',
-                compute_type='float32',
-                cpu_threads=3
-            )
+        if self.loader_thread is None or self.loader_thread.model_path != model_path \
+                or self.loader_thread.settings() != self.inference_settings(model_path):
+            self.start_loading(model_path)
+        elif self.loaded_model is not None:
+            logging.info("Using speculatively preloaded model")
+            self.on_model_loaded(self.loaded_model)
+            return
+        elif self.loader_error is not None:
+            self.on_model_error(f"Не получилось загрузить модель:\n{self.loader_error}")
+            return
+
+        self.loading_dialog.show()
+
+    def drop_preloaded_model(self):
+        # подбор параметров загружает свои копии модели, спекулятивная не должна
+        # занимать память рядом с ними; после выбора модель загрузится заново
+        if self.loaded_model is not None:
+            logging.info("Dropping speculatively preloaded model before calibration")
+        self.loaded_model = None
+        self.loader_error = None
+        self.loader_thread = None
 
+    def start_pending_loading(self):
+        model_path, self.pending_model_path = self.pending_model_path, None
+        self.start_loading(model_path)
+
+    def on_loader_finished(self, thread, transcribe_model):
+        if thread is not self.loader_thread or self.pending_model_path is not None:
+            # спекулятивная загрузка модели, которую пользователь не выбрал
+            return
+
+        self.loaded_model = transcribe_model
+        if self.model_requested:
             self.on_model_loaded(transcribe_model)
 
-        except Exception as e:
-            self.on_model_error(
-                f"Не получилось загрузить модель:\n{e}"
-            )
+    def on_loader_error(self, thread, error_msg):
+        if thread is not self.loader_thread or self.pending_model_path is not None:
+            return
 
-        #self.loader_thread = ModelLoaderThread(model_path)
-        #self.loader_thread.finished_signal.connect(self.on_model_loaded)
-        #self.loader_thread.error_signal.connect(self.on_model_error)
-        #self.loader_thread.start()
+        logging.warning(f"Model loading failed: {error_msg}")
+        self.loader_error = error_msg
+        if self.model_requested:
+            self.on_model_error(f"Не получилось загрузить модель:\n{error_msg}")
 
     def on_model_loaded(self, transcribe_model):
-        translation = Translation(self.available_translate_models())
+        translation = Translation(self.available_translate_models(), memory=TranslationMemory())
         self.window = AppWindow(transcribe_model, translation)
         self.window.show()
+        self.loading_dialog.hide()
+
+        if self.profiler is not None:
+            self.profiler.mark('main_window')
 
     def on_model_error(self, error_msg):
         QMessageBox.critical(None, "Ошибка", error_msg)
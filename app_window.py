@@ -3,13 +3,18 @@ from PyQt6.QtWidgets import QMainWindow, QWidget, QTabWidget
 from PyQt6.QtGui import QIcon
 from utils import resource_path
 from speech_recognition_widget import SpeechRecognitionWidget
+from job_queue_widget import JobQueueWidget
+from audio_cache import AudioCache
 
 
 class AppWindow(QMainWindow):
-    def __init__(self, transcribe_model, translation):
+    def __init__(self, transcribe_model, translation, service_client=None):
         super().__init__()
         self.transcribe_model = transcribe_model
         self.translation = translation
+        self.service_client = service_client
+        # один кэш декодированного аудио на обе вкладки, как и общий переводчик
+        self.audio_cache = AudioCache()
         self.save_dir = os.path.join(os.path.expanduser("~"), 'tr-tr')
         if not os.path.exists(self.save_dir):
             os.makedirs(self.save_dir, exist_ok=True)
@@ -27,9 +32,20 @@ class AppWindow(QMainWindow):
         speech_tab = SpeechRecognitionWidget(
             self.transcribe_model,
             self.translation,
-            self.save_dir
+            self.save_dir,
+            self.service_client,
+            self.audio_cache
         )
         tab_widget.addTab(speech_tab, "Распознавание речи")
 
+        queue_tab = JobQueueWidget(
+            self.transcribe_model,
+            self.translation,
+            self.save_dir,
+            self.service_client,
+            self.audio_cache
+        )
+        tab_widget.addTab(queue_tab, "Очередь файлов")
+
         translate_tab = QWidget()
         tab_widget.addTab(translate_tab, "Переводчик")
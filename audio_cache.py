@@ -0,0 +1,72 @@
+import os
+import logging
+import threading
+from utils import cache_path, file_hash
+
+
+SAMPLE_RATE = 16000
+
+
+class AudioCache:
+    def __init__(self, path=None, max_size_mb=20480):
+        self.path = path or cache_path('audio')
+        self.max_size = max_size_mb * 1024 * 1024
+
+    def load(self, audio_file):
+        import numpy as np
+
+        cached_file = os.path.join(self.path, f'{file_hash(audio_file)}.f32')
+        if not os.path.exists(cached_file):
+            self.store(audio_file, cached_file)
+        else:
+            logging.info(f"Decoded audio cache hit for {audio_file}")
+            # время изменения служит меткой последнего использования для LRU
+            os.utime(cached_file)
+
+        if os.path.getsize(cached_file) == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        # отображение файла в память: faster-whisper читает отсчеты без копирования
+        return np.memmap(cached_file, dtype=np.float32, mode='r')
+
+    def store(self, audio_file, cached_file):
+        from faster_whisper import decode_audio
+
+        logging.info(f"Decoding {audio_file} into audio cache...")
+        audio = decode_audio(audio_file, sampling_rate=SAMPLE_RATE)
+
+        # обе вкладки могут декодировать один файл одновременно: у каждого потока свой временный файл
+        tmp_file = f'{cached_file}.tmp{os.getpid()}-{threading.get_ident()}'
+        try:
+            audio.astype('float32', copy=False).tofile(tmp_file)
+            os.replace(tmp_file, cached_file)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+        self.evict(keep=cached_file)
+
+    def evict(self, keep=None):
+        entries = []
+        for name in os.listdir(self.path):
+            if not name.endswith('.f32'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.path, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, os.path.join(self.path, name)))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+                logging.info(f"Evicted {path} from audio cache")
+            except OSError as e:
+                # файл может быть открыт другим процессом (Windows)
+                logging.warning(f"Failed to evict {path}: {e}")
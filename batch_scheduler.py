@@ -0,0 +1,120 @@
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from faster_whisper import WhisperModel
+from translation import Translation, TranslationMemory
+from processing_engine import ProcessingEngine
+from audio_cache import AudioCache
+import model_registry
+
+
+_worker = {}
+
+
+def init_worker(worker_counter, model_path, compute_type, cpu_threads, num_workers=1, audio_cache_mb=20480):
+    with worker_counter.get_lock():
+        worker_index = worker_counter.value
+        worker_counter.value += 1
+
+    if hasattr(os, 'sched_setaffinity'):
+        cores = sorted(os.sched_getaffinity(0))
+        first = (worker_index * cpu_threads) % len(cores)
+        os.sched_setaffinity(0, cores[first:first + cpu_threads] or cores)
+
+    _worker['transcribe_model'] = WhisperModel(
+        model_size_or_path=model_path,
+        device='cpu',
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        num_workers=num_workers
+    )
+    _worker['translation'] = Translation(
+        model_registry.available_translate_models(),
+        cpu_threads=cpu_threads,
+        memory=TranslationMemory()
+    )
+    _worker['audio_cache'] = AudioCache(max_size_mb=audio_cache_mb) if audio_cache_mb else None
+    _worker['model_path'] = model_path
+    logging.info(f"Worker {worker_index} (pid {os.getpid()}) ready with {cpu_threads} threads")
+
+
+def process_file(audio_file, target_langs, save_dir, engine_options=None):
+    result = {'audio_file': audio_file, 'txt_filename': None, 'duration': 0.0, 'error': None}
+    started = time.monotonic()
+
+    engine = ProcessingEngine(
+        audio_file,
+        target_langs,
+        _worker['transcribe_model'],
+        save_dir,
+        _worker['translation'],
+        on_finished=lambda segments, txt_filename: result.update(txt_filename=txt_filename),
+        on_error=lambda message: result.update(error=message),
+        audio_cache=_worker['audio_cache'],
+        model_path=_worker['model_path'],
+        **(engine_options or {})
+    )
+    engine.run()
+
+    result['duration'] = engine.duration
+    result['elapsed'] = time.monotonic() - started
+    return result
+
+
+class BatchScheduler:
+    def __init__(self, model_path, target_langs, save_dir, num_workers, compute_type='float32', cpu_count=None,
+                 engine_options=None, audio_cache_mb=20480):
+        self.model_path = model_path
+        self.engine_options = engine_options or {}
+        self.audio_cache_mb = audio_cache_mb
+        self.target_langs = target_langs
+        self.save_dir = save_dir
+        self.num_workers = max(1, num_workers)
+        self.compute_type = compute_type
+        cpu_count = cpu_count or os.cpu_count() or 1
+        self.cpu_threads = max(1, cpu_count // self.num_workers)
+
+    def run(self, audio_files, on_result=None):
+        # крупные файлы раздаются первыми, чтобы в конце не ждать одного длинного
+        audio_files = sorted(audio_files, key=os.path.getsize, reverse=True)
+
+        results = []
+        started = time.monotonic()
+        worker_counter = multiprocessing.Value('i', 0)
+
+        with ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            initializer=init_worker,
+            initargs=(
+                worker_counter, self.model_path, self.compute_type, self.cpu_threads,
+                self.engine_options.get('transcribe_workers', 1), self.audio_cache_mb
+            )
+        ) as executor:
+            futures = [
+                executor.submit(process_file, audio_file, self.target_langs, self.save_dir, self.engine_options)
+                for audio_file in audio_files
+            ]
+
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_result:
+                    on_result(result)
+
+                self.log_throughput(results, time.monotonic() - started)
+
+        return results
+
+    @staticmethod
+    def throughput(results, wall_seconds):
+        audio_seconds = sum(result['duration'] for result in results)
+        return audio_seconds / wall_seconds if wall_seconds > 0 else 0.0
+
+    def log_throughput(self, results, wall_seconds):
+        audio_hours = sum(result['duration'] for result in results) / 3600
+        logging.info(
+            f"{len(results)} files, {audio_hours:.2f} audio hours in {wall_seconds / 3600:.2f} wall hours: "
+            f"{self.throughput(results, wall_seconds):.2f} audio-hours/wall-hour"
+        )
@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import subprocess
+import multiprocessing
+from datetime import datetime
+from translation import Translation
+from translation_batcher import TranslationBatcher
+from processing_engine import ProcessingEngine
+from cli import collect_audio_files
+from utils import peak_rss, setup_logging
+import model_registry
+import inference_tuning
+
+
+DEFAULT_CHAINS = [[], ['-en'], ['-ru'], ['-en-ru'], ['-en', '-en-ru']]
+
+
+class TimedTranslator:
+    def __init__(self, model, stats):
+        self.model = model
+        self.stats = stats
+
+    def footprint(self):
+        return self.model.footprint()
+
+    def translate(self, texts):
+        started = time.perf_counter()
+        translated = self.model.translate(texts)
+        self.stats['seconds'] += time.perf_counter() - started
+        self.stats['tokens'] += sum(TranslationBatcher.count_tokens(text) for text in translated)
+        return translated
+
+
+class BenchmarkTranslation(Translation):
+    def __init__(self, translate_model_paths, **kwargs):
+        super().__init__(translate_model_paths, **kwargs)
+        self.stats = {'seconds': 0.0, 'tokens': 0, 'load_seconds': 0.0}
+
+    def create_model(self, model_path):
+        started = time.perf_counter()
+        model = TimedTranslator(super().create_model(model_path), self.stats)
+        self.stats['load_seconds'] += time.perf_counter() - started
+        return model
+
+
+def run_config(model_path, target_langs, audio_files, save_dir, options):
+    from faster_whisper import WhisperModel
+
+    settings = inference_tuning.resolve_settings(model_path)
+    started = time.perf_counter()
+    transcribe_model = WhisperModel(model_size_or_path=model_path, local_files_only=True, **settings)
+    model_load_seconds = time.perf_counter() - started
+
+    # память переводов и кэш языков отключены, чтобы повторные прогоны не измеряли кэш
+    translation = BenchmarkTranslation(model_registry.available_translate_models())
+
+    audio_seconds = 0.0
+    segments = 0
+    errors = []
+    started = time.perf_counter()
+    for audio_file in audio_files:
+        engine = ProcessingEngine(
+            audio_file, target_langs, transcribe_model, save_dir, translation,
+            on_error=errors.append, model_path=model_path, language_cache=False, **options
+        )
+        # чекпоинт от прошлого прогона превратил бы замер в продолжение
+        if os.path.exists(engine.checkpoint_path()):
+            os.remove(engine.checkpoint_path())
+        engine.run()
+        audio_seconds += engine.duration
+        segments += len(engine.segments)
+    processing_seconds = time.perf_counter() - started
+
+    stats = translation.stats
+    return {
+        'model': os.path.basename(model_path),
+        'chains': target_langs,
+        'options': options,
+        'settings': settings,
+        'files': len(audio_files),
+        'errors': errors,
+        'audio_seconds': round(audio_seconds, 3),
+        'processing_seconds': round(processing_seconds, 3),
+        'real_time_factor': round(processing_seconds / audio_seconds, 4) if audio_seconds else None,
+        'segments_per_second': round(segments / processing_seconds, 3) if processing_seconds else None,
+        'translation_tokens_per_second': round(stats['tokens'] / stats['seconds'], 1) if stats['seconds'] else None,
+        'translation_load_seconds': round(stats['load_seconds'], 3),
+        'model_load_seconds': round(model_load_seconds, 3),
+        'peak_rss_mb': round(peak_rss() / 2**20, 1) if peak_rss() else None,
+    }
+
+
+def git_version():
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def result_key(result):
+    return result['model'], ' '.join(result['chains']), json.dumps(result['options'], sort_keys=True)
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {result_key(result): result for result in json.load(f)['results']}
+
+    regressions = []
+    for result in results:
+        before = baseline.get(result_key(result))
+        if not before or not before['real_time_factor'] or not result['real_time_factor']:
+            continue
+        change = result['real_time_factor'] / before['real_time_factor'] - 1
+        logging.info(f"{' / '.join(result_key(result))}: RTF {before['real_time_factor']} -> {result['real_time_factor']} ({change:+.1%})")
+        if change > tolerance:
+            regressions.append(result_key(result))
+
+    for key in regressions:
+        logging.error(f"Regression: {' / '.join(key)}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmark', description="Замер скорости распознавания и перевода")
+    parser.add_argument('--corpus', default=os.path.join('bench', 'corpus'), help="каталог с аудио для замера")
+    parser.add_argument('--models', nargs='*', help="модели из repo/Systran, по умолчанию все")
+    parser.add_argument(
+        '--chains', nargs='*',
+        help="наборы цепочек через запятую, например '' en en,en-ru; по умолчанию стандартный набор"
+    )
+    parser.add_argument(
+        '--modes', nargs='*', default=['sequential', 'batched'],
+        choices=['sequential', 'chunked', 'batched'], help="режимы распознавания"
+    )
+    parser.add_argument('--batch-sizes', nargs='*', type=int, default=[8, 16], help="размеры пакета для batched")
+    parser.add_argument('--output', default=None, help="JSON с результатами")
+    parser.add_argument('--baseline', default=None, help="JSON прошлого прогона для сравнения")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="допустимое ухудшение RTF, доля")
+    return parser.parse_args(argv)
+
+
+def parse_chains(values):
+    if values is None:
+        return DEFAULT_CHAINS
+    return [
+        [f"-{chain.lstrip('-')}" for chain in value.split(',') if chain]
+        for value in values
+    ]
+
+
+def benchmark_configs(args):
+    model_paths = [
+        model_path
+        for models in model_registry.available_transcribe_models().values()
+        for _, model_path in models
+        if not args.models or os.path.basename(model_path) in args.models
+    ]
+    for model_path in model_paths:
+        for target_langs in parse_chains(args.chains):
+            for mode in args.modes:
+                if mode == 'batched':
+                    for batch_size in args.batch_sizes:
+                        yield model_path, target_langs, {'transcribe_mode': mode, 'batch_size': batch_size}
+                else:
+                    yield model_path, target_langs, {'transcribe_mode': mode}
+
+
+def batched_speedups(results):
+    # во сколько раз пакетный режим быстрее последовательного для каждой модели
+    sequential = {
+        (result['model'], ' '.join(result['chains'])): result['real_time_factor']
+        for result in results
+        if result['options'].get('transcribe_mode') == 'sequential' and result['real_time_factor']
+    }
+
+    speedups = []
+    for result in results:
+        if result['options'].get('transcribe_mode') != 'batched' or not result['real_time_factor']:
+            continue
+        baseline = sequential.get((result['model'], ' '.join(result['chains'])))
+        if baseline:
+            speedup = round(baseline / result['real_time_factor'], 3)
+            speedups.append({
+                'model': result['model'],
+                'chains': result['chains'],
+                'batch_size': result['options']['batch_size'],
+                'speedup': speedup,
+                'batched_faster': speedup > 1,
+            })
+            logging.info(
+                f"{result['model']} {result['chains']} batch {result['options']['batch_size']}: "
+                f"batched is {speedup:.2f}x sequential"
+            )
+    return speedups
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging()
+
+    audio_files = collect_audio_files([args.corpus])
+    if not audio_files:
+        logging.error(f"No audio files in corpus {args.corpus}")
+        return 1
+
+    save_dir = os.path.join('bench', 'output')
+    os.makedirs(save_dir, exist_ok=True)
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for model_path, target_langs, options in benchmark_configs(args):
+        logging.info(f"Benchmark {os.path.basename(model_path)} {target_langs} {options}...")
+        # отдельный процесс на конфигурацию: честные время загрузки и пик памяти
+        with context.Pool(1) as pool:
+            result = pool.apply(run_config, (model_path, target_langs, audio_files, save_dir, options))
+        logging.info(json.dumps(result, ensure_ascii=False))
+        results.append(result)
+
+    report = {
+        'version': git_version(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'node': platform.node(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+        },
+        'corpus': [os.path.relpath(audio_file, args.corpus) for audio_file in audio_files],
+        'results': results,
+        'batched_vs_sequential': batched_speedups(results),
+    }
+
+    output = args.output or os.path.join('bench', 'results', f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logging.info(f"Benchmark results saved to: {output}")
+
+    if args.baseline and compare(results, args.baseline, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,19 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+import inference_tuning
+
+
+class CalibrationThread(QThread):
+    progress_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(dict)
+    error_signal = pyqtSignal(str)
+
+    def __init__(self, model_path):
+        super().__init__()
+        self.model_path = model_path
+
+    def run(self):
+        try:
+            best = inference_tuning.calibrate(self.model_path, on_progress=self.progress_signal.emit)
+            self.finished_signal.emit(best)
+        except Exception as e:
+            self.error_signal.emit(str(e))
@@ -0,0 +1,83 @@
+import os
+import json
+import time
+import logging
+
+
+class CheckpointJournal:
+    def __init__(self, path, fsync_every=32, fsync_interval=5.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.file = None
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def open(self, append=False):
+        self.file = open(self.path, 'a' if append else 'w', encoding='utf-8')
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        return self
+
+    def write_header(self, **header):
+        self.file.write(json.dumps({'type': 'header', **header}, ensure_ascii=False) + '\n')
+        self.file.flush()
+        self.unsynced += 1
+
+    def append(self, start, end, text, translations):
+        self.file.write(json.dumps(
+            {'start': start, 'end': end, 'text': text, 'translations': translations},
+            ensure_ascii=False
+        ) + '\n')
+        self.file.flush()
+        self.unsynced += 1
+
+        if self.unsynced >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self.file is None or not self.unsynced:
+            return
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        if self.file is None:
+            return
+        self.sync()
+        self.file.close()
+        self.file = None
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    @staticmethod
+    def read_records(path):
+        if not os.path.exists(path):
+            return
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # последняя строка могла не дописаться при аварийном завершении
+                    logging.warning(f"Skipping incomplete checkpoint record in {path}")
+                    return
+
+    @classmethod
+    def read_header(cls, path):
+        for record in cls.read_records(path):
+            return record if record.get('type') == 'header' else None
+        return None
+
+    @classmethod
+    def read(cls, path):
+        return [
+            (record['start'], record['end'], record['text'], record['translations'])
+            for record in cls.read_records(path)
+            if record.get('type') != 'header'
+        ]
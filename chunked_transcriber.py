@@ -0,0 +1,104 @@
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+SAMPLE_RATE = 16000
+
+ChunkSegment = namedtuple('ChunkSegment', ['start', 'end', 'text'])
+ChunkedTranscriptionInfo = namedtuple('ChunkedTranscriptionInfo', ['language', 'language_probability', 'duration'])
+
+
+class ChunkedTranscriber:
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, transcribe_model, workers=2, min_chunk_seconds=60, max_chunk_seconds=600,
+                 is_running=lambda: True):
+        self.transcribe_model = transcribe_model
+        self.workers = max(1, workers)
+        self.is_running = is_running
+        self.min_chunk_seconds = min_chunk_seconds
+        self.max_chunk_seconds = max_chunk_seconds
+
+    def split_chunks(self, audio):
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+        speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=500))
+        if not speech:
+            return []
+
+        # кусков в несколько раз больше, чем исполнителей, чтобы они освобождались равномерно
+        total_speech = sum(region['end'] - region['start'] for region in speech) / SAMPLE_RATE
+        target = min(max(total_speech / (self.workers * 4), self.min_chunk_seconds), self.max_chunk_seconds)
+
+        chunks = []
+        chunk_start = speech[0]['start']
+        for region, next_region in zip(speech, speech[1:] + [None]):
+            if next_region is None:
+                chunks.append((chunk_start, region['end']))
+            elif (region['end'] - chunk_start) / SAMPLE_RATE >= target:
+                # граница куска - середина паузы между фрагментами речи
+                cut = (region['end'] + next_region['start']) // 2
+                chunks.append((chunk_start, cut))
+                chunk_start = cut
+        return chunks
+
+    def transcribe(self, audio, clip_timestamps=None, language=None, **options):
+        from faster_whisper import decode_audio
+
+        if isinstance(audio, str):
+            audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
+        duration = len(audio) / SAMPLE_RATE
+
+        resume_from = int(clip_timestamps[0] * SAMPLE_RATE) if clip_timestamps else 0
+        chunks = [
+            (max(start, resume_from), end)
+            for start, end in self.split_chunks(audio)
+            if end > resume_from
+        ]
+
+        language_probability = 1.0
+        if language is None:
+            start, end = chunks[0] if chunks else (0, len(audio))
+            _, first_info = self.transcribe_model.transcribe(audio[start:end], **options)
+            language, language_probability = first_info.language, first_info.language_probability
+
+        logging.info(f"Transcribing {len(chunks)} chunks with {self.workers} workers")
+        info = ChunkedTranscriptionInfo(language, language_probability, duration)
+        return self.ordered_segments(audio, chunks, language, options), info
+
+    def transcribe_chunk(self, audio, start, end, language, options, cancelled):
+        offset = start / SAMPLE_RATE
+        segments, _ = self.transcribe_model.transcribe(audio[start:end], language=language, **options)
+
+        result = []
+        for segment in segments:
+            if cancelled.is_set() or not self.is_running():
+                break
+            result.append(ChunkSegment(segment.start + offset, segment.end + offset, segment.text))
+        return result
+
+    def ordered_segments(self, audio, chunks, language, options):
+        cancelled = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='whisper-chunk')
+        try:
+            futures = [
+                executor.submit(self.transcribe_chunk, audio, start, end, language, options, cancelled)
+                for start, end in chunks
+            ]
+            # куски отдаются по порядку: как только готов очередной префикс;
+            # ожидание прерывается остановкой, не дожидаясь длинного куска
+            for future in futures:
+                while True:
+                    if not self.is_running():
+                        return
+                    try:
+                        segments = future.result(timeout=self.POLL_INTERVAL)
+                        break
+                    except FutureTimeoutError:
+                        continue
+                yield from segments
+        finally:
+            cancelled.set()
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,195 @@
+import os
+import sys
+import logging
+import argparse
+import multiprocessing
+from faster_whisper import WhisperModel
+from translation import Translation, TranslationMemory
+from processing_engine import ProcessingEngine
+from batch_scheduler import BatchScheduler
+from audio_cache import AudioCache
+from utils import setup_logging
+import model_registry
+import inference_tuning
+
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.ogg', '.flac', '.mp4')
+
+
+def collect_audio_files(paths):
+    audio_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                audio_files.extend(
+                    os.path.join(root, name)
+                    for name in sorted(files)
+                    if name.lower().endswith(AUDIO_EXTENSIONS)
+                )
+        else:
+            audio_files.append(path)
+    return audio_files
+
+
+def target_chain(value):
+    # "-en-ru", "en-ru" -> "-en-ru"
+    return value if value.startswith('-') else f'-{value}'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='tr-tr',
+        description="Распознавание речи с автопереводом без графического интерфейса"
+    )
+    parser.add_argument('paths', nargs='+', help="аудио файлы или каталоги")
+    parser.add_argument(
+        '-t', '--target', dest='target_langs', action='append', type=target_chain, default=[],
+        help="цепочка перевода, например en, ru или en-ru (можно указать несколько раз)"
+    )
+    parser.add_argument(
+        '-l', '--language', default=None,
+        help="язык речи (he, ar, en...), чтобы не определять его автоматически"
+    )
+    parser.add_argument(
+        '-m', '--model', default='faster-whisper-small',
+        help="модель распознавания из repo/Systran или путь к ней"
+    )
+    parser.add_argument('-o', '--output-dir', default=os.path.join(os.path.expanduser("~"), 'tr-tr'))
+    parser.add_argument(
+        '--compute-type', default=None,
+        help="int8, int16, float32...; по умолчанию - подобранное --calibrate значение"
+    )
+    parser.add_argument('--cpu-threads', type=int, default=None)
+    parser.add_argument(
+        '--calibrate', action='store_true',
+        help="подобрать compute_type и число потоков для модели на этом компьютере"
+    )
+    parser.add_argument(
+        '--num-workers', type=int, default=1,
+        help="число параллельных исполнителей модели распознавания (для --mode chunked)"
+    )
+    parser.add_argument(
+        '--mode', choices=['sequential', 'chunked', 'batched', 'follow'], default='sequential',
+        help="chunked - делить длинный файл по паузам и распознавать фрагменты параллельно, "
+             "batched - пакетный конвейер faster-whisper, "
+             "follow - распознавать WAV, который еще записывается"
+    )
+    parser.add_argument('--batch-size', type=int, default=8, help="размер пакета для --mode batched")
+    parser.add_argument(
+        '--audio-cache-mb', type=int, default=20480,
+        help="лимит кэша декодированного аудио, 0 - не использовать кэш"
+    )
+    parser.add_argument('--translation-threads', type=int, default=0)
+    parser.add_argument(
+        '--translation-budget-mb', type=int, default=2048,
+        help="лимит памяти для загруженных моделей перевода, 0 - без лимита"
+    )
+    parser.add_argument(
+        '-j', '--workers', type=int, default=1,
+        help="число процессов, каждый со своей моделью и долей ядер"
+    )
+    return parser.parse_args(argv)
+
+
+def run_scheduler(args, model_path, audio_files):
+    def on_result(result):
+        if result['error']:
+            logging.error(f"{result['audio_file']}: {result['error']}")
+        else:
+            print(result['txt_filename'], flush=True)
+
+    scheduler = BatchScheduler(
+        model_path,
+        args.target_langs,
+        args.output_dir,
+        args.workers,
+        compute_type=args.compute_type,
+        cpu_count=args.cpu_threads,
+        engine_options={
+            'transcribe_mode': args.mode,
+            'transcribe_workers': args.num_workers,
+            'batch_size': args.batch_size,
+            'language': args.language,
+        },
+        audio_cache_mb=args.audio_cache_mb
+    )
+    results = scheduler.run(audio_files, on_result=on_result)
+    return 1 if any(result['error'] for result in results) else 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging()
+
+    audio_files = collect_audio_files(args.paths)
+    if not audio_files:
+        logging.error("No audio files found")
+        return 1
+
+    model_path = model_registry.resolve_model_path(args.model)
+    if not os.path.exists(model_path):
+        logging.error(f"Transcribe model not found: {model_path}")
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    if args.calibrate:
+        inference_tuning.calibrate(model_path, on_progress=logging.info)
+
+    settings = inference_tuning.resolve_settings(
+        model_path, args.compute_type, args.cpu_threads, num_workers=args.num_workers
+    )
+    if not args.cpu_threads and inference_tuning.saved_settings(model_path) is None:
+        settings['cpu_threads'] = os.cpu_count() or 1
+    args.compute_type = settings['compute_type']
+    args.cpu_threads = args.cpu_threads or os.cpu_count() or 1
+
+    if args.workers > 1:
+        return run_scheduler(args, model_path, audio_files)
+
+    logging.info(f"load_model {model_path}...")
+    transcribe_model = WhisperModel(
+        model_size_or_path=model_path,
+        **settings
+    )
+    translation = Translation(
+        model_registry.available_translate_models(),
+        cpu_threads=args.translation_threads,
+        memory=TranslationMemory(),
+        memory_budget_mb=args.translation_budget_mb
+    )
+
+    audio_cache = AudioCache(max_size_mb=args.audio_cache_mb) if args.audio_cache_mb else None
+
+    failed = 0
+    for audio_file in audio_files:
+        logging.info(f"Processing {audio_file}...")
+        errors = []
+        engine = ProcessingEngine(
+            audio_file,
+            args.target_langs,
+            transcribe_model,
+            args.output_dir,
+            translation,
+            on_finished=lambda segments, txt_filename: print(txt_filename, flush=True),
+            on_error=errors.append,
+            transcribe_mode=args.mode,
+            transcribe_workers=args.num_workers,
+            batch_size=args.batch_size,
+            audio_cache=audio_cache,
+            language=args.language,
+            model_path=model_path
+        )
+        engine.run()
+
+        if errors:
+            failed += 1
+            logging.error(f"{audio_file}: {errors[-1]}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import logging
+import platform
+from utils import cache_path
+
+
+DEFAULT_SETTINGS = {'device': 'cpu', 'compute_type': 'float32', 'cpu_threads': 3, 'num_workers': 1}
+SAMPLE_RATE = 16000
+N_FRAMES = 3000
+CALIBRATION_TOKENS = 64
+
+
+def settings_path():
+    return os.path.join(cache_path('tuning'), 'inference_settings.json')
+
+
+def machine_key():
+    return f"{platform.node()}-{platform.machine()}-{os.cpu_count()}"
+
+
+def model_key(model_path):
+    return os.path.basename(os.path.normpath(model_path))
+
+
+def read_all_settings():
+    if not os.path.exists(settings_path()):
+        return {}
+    try:
+        with open(settings_path(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"Failed to read inference settings: {e}")
+        return {}
+
+
+def saved_settings(model_path):
+    return read_all_settings().get(machine_key(), {}).get(model_key(model_path))
+
+
+def save_settings(model_path, settings):
+    all_settings = read_all_settings()
+    all_settings.setdefault(machine_key(), {})[model_key(model_path)] = settings
+    tmp_path = f"{settings_path()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(all_settings, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, settings_path())
+
+
+def resolve_settings(model_path, compute_type=None, cpu_threads=None, device=None, num_workers=None):
+    # ручные настройки важнее подобранных, подобранные - важнее значений по умолчанию
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update({
+        k: v for k, v in (saved_settings(model_path) or {}).items()
+        if k in DEFAULT_SETTINGS
+    })
+    if device:
+        settings['device'] = device
+    if compute_type:
+        settings['compute_type'] = compute_type
+    if cpu_threads:
+        settings['cpu_threads'] = cpu_threads
+    if num_workers:
+        settings['num_workers'] = num_workers
+    return settings
+
+
+def calibration_clip(seconds=10):
+    # синтетический сигнал с речеподобной огибающей: нужен только для замера
+    # скорости, от его содержимого объем работы декодера не зависит
+    import numpy as np
+
+    t = np.arange(seconds * SAMPLE_RATE, dtype=np.float32) / SAMPLE_RATE
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 3 * t))
+    voice = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((180, 360, 720, 1440), start=1))
+    return (0.1 * envelope * voice).astype(np.float32)
+
+
+def candidate_settings():
+    import ctranslate2
+
+    candidates = []
+    if ctranslate2.get_cuda_device_count() > 0:
+        supported = ctranslate2.get_supported_compute_types('cuda')
+        for compute_type in ('int8_float16', 'float16', 'float32'):
+            if compute_type in supported:
+                candidates.append({'device': 'cuda', 'compute_type': compute_type, 'cpu_threads': 1})
+
+    cpu_count = os.cpu_count() or 1
+    thread_counts = sorted({max(1, cpu_count // 4), max(1, cpu_count // 2), cpu_count})
+    supported = ctranslate2.get_supported_compute_types('cpu')
+    for compute_type in ('int8', 'int8_float32', 'int16', 'float32'):
+        if compute_type not in supported:
+            continue
+        for cpu_threads in thread_counts:
+            candidates.append({'device': 'cpu', 'compute_type': compute_type, 'cpu_threads': cpu_threads})
+
+    return candidates
+
+
+def benchmark(model_path, settings, clip):
+    import numpy as np
+    from faster_whisper import WhisperModel
+    from faster_whisper.tokenizer import Tokenizer
+
+    model = WhisperModel(model_size_or_path=model_path, local_files_only=True, **settings)
+    tokenizer = Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task='transcribe', language='en')
+
+    # transcribe на таком сигнале то ничего не выдает, то галлюцинирует до предела
+    # токенов, причем по-разному для разных compute_type. Поэтому работа фиксирована:
+    # энкодер на полном 30-секундном окне и ровно CALIBRATION_TOKENS шагов декодера
+    # без временных меток, повторов с другой температурой и досрочного конца текста
+    features = model.feature_extractor(clip)[:, :N_FRAMES]
+    features = np.pad(features, ((0, 0), (0, N_FRAMES - features.shape[-1])))
+    prompt = list(tokenizer.sot_sequence) + [tokenizer.no_timestamps]
+
+    def run():
+        encoder_output = model.encode(features)
+        model.model.generate(
+            encoder_output,
+            [prompt],
+            beam_size=5,
+            max_length=CALIBRATION_TOKENS,
+            suppress_tokens=[tokenizer.eot],
+            suppress_blank=False
+        )
+
+    # первый прогон прогревает аллокаторы и не учитывается
+    run()
+
+    started = time.perf_counter()
+    run()
+    return time.perf_counter() - started
+
+
+def calibrate(model_path, on_progress=None):
+    clip = calibration_clip()
+    candidates = candidate_settings()
+    best = None
+
+    for i, settings in enumerate(candidates):
+        description = f"{settings['device']}, {settings['compute_type']}, потоков: {settings['cpu_threads']}"
+        if on_progress:
+            on_progress(f"Замер {i + 1}/{len(candidates)}: {description}")
+        try:
+            seconds = benchmark(model_path, settings, clip)
+        except Exception as e:
+            logging.warning(f"Calibration candidate {settings} failed: {e}")
+            continue
+
+        logging.info(f"Calibration {model_key(model_path)} {settings}: {seconds:.2f}s")
+        if best is None or seconds < best['seconds']:
+            best = {**settings, 'seconds': round(seconds, 3)}
+
+    if best is None:
+        raise RuntimeError("Ни одна конфигурация не прошла замер")
+
+    save_settings(model_path, best)
+    logging.info(f"Calibrated {model_key(model_path)} on {machine_key()}: {best}")
+    return best
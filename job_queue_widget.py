@@ -0,0 +1,361 @@
+import os
+from PyQt6.QtWidgets import (
+    QApplication, QFileDialog,
+    QVBoxLayout, QHBoxLayout,
+    QWidget, QPushButton, QLabel,
+    QListWidget, QListWidgetItem, QAbstractItemView
+)
+from PyQt6.QtCore import Qt, QSettings
+from segment_list_model import SegmentListModel
+from processing_job import ProcessingJob
+from ui_components import (
+    AUDIO_FILE_FILTER,
+    SegmentBuffer,
+    TargetLanguageSelector,
+    create_panels,
+    create_language_combo,
+    create_mode_combo,
+    create_results_view,
+    section_label,
+)
+from styles import (
+    STATUS_LABEL_ERROR,
+    STATUS_LABEL_WARNING,
+    STATUS_LABEL_READY,
+    STATUS_LABEL_SUCCESS,
+    EXPORT_BUTTON,
+    AUDIO_PATH_LABEL,
+    CANCEL_BUTTON,
+    PROCESS_BUTTON,
+    SETTINGS_CARD,
+    SELECT_AUDIO_BUTTON,
+    UPLOAD_CARD,
+)
+
+
+class JobQueueWidget(QWidget):
+    def __init__(self, transcribe_model, translation, save_dir, service_client=None, audio_cache=None):
+        super().__init__()
+        self.transcribe_model = transcribe_model
+        self.translation = translation
+        self.save_dir = save_dir
+        self.service_client = service_client
+        self.audio_cache = audio_cache
+        self.settings = QSettings("tr-tr", "TrTr")
+        self.current_job = None
+        self.queue_running = False
+
+        # сегменты выполняемого задания добавляются в его модель пачками, как и на основной вкладке
+        self.segment_buffer = SegmentBuffer(self, self.render_segments)
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        left_layout, right_layout = create_panels(self)
+
+        queue_card = QWidget()
+        queue_card.setStyleSheet(UPLOAD_CARD)
+        queue_layout = QVBoxLayout(queue_card)
+
+        queue_layout.addWidget(section_label("Очередь файлов"))
+
+        self.add_files_btn = QPushButton("Добавить файлы")
+        self.add_files_btn.clicked.connect(self.add_files)
+        self.add_files_btn.setStyleSheet(SELECT_AUDIO_BUTTON)
+        queue_layout.addWidget(self.add_files_btn)
+
+        # порядок задается перетаскиванием или кнопками, выполняется сверху вниз
+        self.job_list = QListWidget()
+        self.job_list.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
+        self.job_list.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.job_list.currentItemChanged.connect(self.show_selected_job)
+        queue_layout.addWidget(self.job_list)
+
+        job_buttons_widget = QWidget()
+        job_buttons_layout = QHBoxLayout(job_buttons_widget)
+        job_buttons_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.move_up_btn = QPushButton("Вверх")
+        self.move_up_btn.clicked.connect(lambda: self.move_selected_job(-1))
+        self.move_down_btn = QPushButton("Вниз")
+        self.move_down_btn.clicked.connect(lambda: self.move_selected_job(1))
+        self.cancel_job_btn = QPushButton("Отменить")
+        self.cancel_job_btn.clicked.connect(self.cancel_selected_job)
+        self.remove_job_btn = QPushButton("Убрать")
+        self.remove_job_btn.clicked.connect(self.remove_selected_job)
+
+        for btn in [self.move_up_btn, self.move_down_btn, self.cancel_job_btn, self.remove_job_btn]:
+            btn.setStyleSheet(EXPORT_BUTTON)
+            job_buttons_layout.addWidget(btn)
+
+        queue_layout.addWidget(job_buttons_widget)
+
+        left_layout.addWidget(queue_card)
+        left_layout.addSpacing(5)
+
+        settings_card = QWidget()
+        settings_card.setStyleSheet(SETTINGS_CARD)
+        settings_layout = QVBoxLayout(settings_card)
+
+        settings_layout.addWidget(section_label("Для новых файлов переводить на"))
+
+        self.target_langs = TargetLanguageSelector(settings_layout)
+
+        settings_layout.addWidget(section_label("Язык речи"))
+
+        self.language_combo = create_language_combo()
+        settings_layout.addWidget(self.language_combo)
+
+        settings_layout.addWidget(section_label("Режим распознавания"))
+
+        self.transcribe_mode_combo = create_mode_combo()
+        settings_layout.addWidget(self.transcribe_mode_combo)
+
+        left_layout.addWidget(settings_card)
+        left_layout.addSpacing(5)
+
+        queue_buttons_widget = QWidget()
+        queue_buttons_layout = QHBoxLayout(queue_buttons_widget)
+        queue_buttons_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.start_queue_btn = QPushButton("Запустить очередь")
+        self.start_queue_btn.clicked.connect(self.start_queue)
+        self.start_queue_btn.setStyleSheet(PROCESS_BUTTON)
+
+        self.pause_queue_btn = QPushButton("Пауза")
+        self.pause_queue_btn.clicked.connect(self.pause_queue)
+        self.pause_queue_btn.setStyleSheet(CANCEL_BUTTON)
+        self.pause_queue_btn.setToolTip("Текущий файл будет дообработан, следующие не запустятся")
+
+        queue_buttons_layout.addWidget(self.start_queue_btn)
+        queue_buttons_layout.addWidget(self.pause_queue_btn)
+
+        left_layout.addWidget(queue_buttons_widget)
+
+        results_header = QWidget()
+        results_header_layout = QHBoxLayout(results_header)
+
+        self.job_label = QLabel("Задание не выбрано")
+        self.job_label.setStyleSheet(AUDIO_PATH_LABEL)
+
+        self.copy_btn = QPushButton("Копировать")
+        self.copy_btn.clicked.connect(self.copy_results)
+        self.copy_btn.setStyleSheet(EXPORT_BUTTON)
+
+        results_header_layout.addWidget(self.job_label)
+        results_header_layout.addStretch()
+        results_header_layout.addWidget(self.copy_btn)
+
+        right_layout.addWidget(results_header)
+
+        self.results_view = create_results_view(SegmentListModel(self))
+
+        right_layout.addWidget(self.results_view)
+
+        self.status_label = QLabel("Добавьте файлы в очередь")
+        right_layout.addWidget(self.status_label)
+
+        self.update_ui_state()
+
+    def jobs(self):
+        return [self.job_list.item(row).data(Qt.ItemDataRole.UserRole) for row in range(self.job_list.count())]
+
+    def selected_job(self):
+        item = self.job_list.currentItem()
+        return item.data(Qt.ItemDataRole.UserRole) if item is not None else None
+
+    def job_item(self, job):
+        for row in range(self.job_list.count()):
+            if self.job_list.item(row).data(Qt.ItemDataRole.UserRole) is job:
+                return self.job_list.item(row)
+        return None
+
+    def update_job_item(self, job):
+        item = self.job_item(job)
+        if item is not None:
+            item.setText(job.title())
+            item.setToolTip(job.message or job.audio_file)
+        if job is self.selected_job():
+            self.show_selected_job()
+        self.update_ui_state()
+
+    def update_ui_state(self):
+        job = self.selected_job()
+        has_queued = any(queued.status == 'queued' for queued in self.jobs())
+        self.start_queue_btn.setEnabled(has_queued and not self.queue_running)
+        self.pause_queue_btn.setEnabled(self.queue_running)
+        self.move_up_btn.setEnabled(job is not None and self.job_list.currentRow() > 0)
+        self.move_down_btn.setEnabled(job is not None and self.job_list.currentRow() < self.job_list.count() - 1)
+        self.cancel_job_btn.setEnabled(job is not None and job.status in ('queued', 'running'))
+        self.remove_job_btn.setEnabled(job is not None and not job.is_running())
+        self.copy_btn.setEnabled(job is not None and job.results_model.rowCount() > 0)
+
+    def add_files(self):
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Выберите аудио файлы",
+            "",
+            AUDIO_FILE_FILTER
+        )
+
+        # настройки запоминаются в задании в момент добавления
+        for file_path in file_paths:
+            job = ProcessingJob(
+                file_path,
+                self.target_langs.selected(),
+                transcribe_mode=self.transcribe_mode_combo.currentData(),
+                transcribe_workers=int(self.settings.value('num_workers', 1)),
+                batch_size=int(self.settings.value('batch_size', 8)),
+                language=self.language_combo.currentData(),
+                model_path=self.settings.value('transcribe_model_path', '')
+            )
+            item = QListWidgetItem(job.title())
+            item.setData(Qt.ItemDataRole.UserRole, job)
+            item.setToolTip(file_path)
+            self.job_list.addItem(item)
+
+        if file_paths:
+            self.status_label.setStyleSheet(STATUS_LABEL_READY)
+            self.status_label.setText(f"Добавлено файлов: {len(file_paths)}")
+            if self.job_list.currentItem() is None:
+                self.job_list.setCurrentRow(0)
+            if self.queue_running:
+                self.start_next_job()
+        self.update_ui_state()
+
+    def move_selected_job(self, offset):
+        row = self.job_list.currentRow()
+        new_row = row + offset
+        if row < 0 or not 0 <= new_row < self.job_list.count():
+            return
+
+        item = self.job_list.takeItem(row)
+        self.job_list.insertItem(new_row, item)
+        self.job_list.setCurrentRow(new_row)
+
+    def cancel_selected_job(self):
+        job = self.selected_job()
+        if job is None:
+            return
+
+        if job.status == 'queued':
+            job.status = 'cancelled'
+            self.update_job_item(job)
+        elif job.is_running():
+            self.status_label.setStyleSheet(STATUS_LABEL_WARNING)
+            self.status_label.setText(f"Останавливается {os.path.basename(job.audio_file)}...")
+            job.thread.stop()
+
+    def remove_selected_job(self):
+        job = self.selected_job()
+        if job is None or job.is_running():
+            return
+        self.job_list.takeItem(self.job_list.currentRow())
+        self.show_selected_job()
+
+    def start_queue(self):
+        self.queue_running = True
+        self.start_next_job()
+
+    def pause_queue(self):
+        self.queue_running = False
+        self.status_label.setStyleSheet(STATUS_LABEL_WARNING)
+        self.status_label.setText("Очередь приостановлена")
+        self.update_ui_state()
+
+    def start_next_job(self):
+        if self.current_job is not None:
+            return
+
+        job = next((queued for queued in self.jobs() if queued.status == 'queued'), None)
+        if job is None:
+            self.queue_running = False
+            self.status_label.setStyleSheet(STATUS_LABEL_SUCCESS)
+            self.status_label.setText("Очередь обработана")
+            self.update_ui_state()
+            return
+
+        self.current_job = job
+        job.status = 'running'
+        job.results_model.clear()
+        job.thread = job.create_thread(
+            self.transcribe_model, self.translation, self.save_dir, self.service_client, self.audio_cache
+        )
+        job.thread.progress_updated.connect(lambda message, job=job: self.job_progress(job, message))
+        job.thread.segment_processed.connect(self.segment_buffer.append)
+        job.thread.finished_processing.connect(
+            lambda segments, txt_filename, job=job: self.job_finished(job, txt_filename)
+        )
+        job.thread.error_occurred.connect(lambda message, job=job: self.job_error(job, message))
+        job.thread.finished.connect(lambda job=job: self.job_thread_finished(job))
+        job.thread.start()
+
+        self.update_job_item(job)
+
+    def render_segments(self, segments):
+        if self.current_job is not None:
+            self.current_job.results_model.add_segments(segments)
+
+    def job_progress(self, job, message):
+        job.message = message
+        if job is self.selected_job():
+            self.status_label.setStyleSheet(STATUS_LABEL_READY)
+            self.status_label.setText(message)
+
+    def job_finished(self, job, txt_filename):
+        job.status = 'finished'
+        job.txt_filename = txt_filename
+        job.language = job.thread.language
+        job.message = f"Результаты сохранены в: {txt_filename}"
+        if job.language:
+            self.settings.setValue('source_language', job.language)
+
+    def job_error(self, job, message):
+        job.status = 'error'
+        job.message = f"Ошибка: {message}"
+
+    def job_thread_finished(self, job):
+        self.segment_buffer.flush()
+
+        if job.status == 'running':
+            job.status = 'cancelled'
+            job.message = "Обработка остановлена пользователем"
+        job.thread = None
+        self.current_job = None
+        self.update_job_item(job)
+
+        if self.queue_running:
+            self.start_next_job()
+
+    def show_selected_job(self, *args):
+        job = self.selected_job()
+        self.results_view.itemDelegate().invalidate()
+        if job is None:
+            self.results_view.setModel(SegmentListModel(self))
+            self.job_label.setText("Задание не выбрано")
+            self.update_ui_state()
+            return
+
+        if self.results_view.model() is not job.results_model:
+            self.results_view.setModel(job.results_model)
+        self.job_label.setText(os.path.basename(job.audio_file))
+
+        style = {
+            'finished': STATUS_LABEL_SUCCESS,
+            'error': STATUS_LABEL_ERROR,
+            'cancelled': STATUS_LABEL_WARNING,
+        }.get(job.status, STATUS_LABEL_READY)
+        self.status_label.setStyleSheet(style)
+        self.status_label.setText(job.message or job.title())
+        self.update_ui_state()
+
+    def copy_results(self):
+        job = self.selected_job()
+        if job is None:
+            return
+
+        text = job.results_model.to_plain_text()
+        if text:
+            QApplication.clipboard().setText(text)
+            self.status_label.setStyleSheet(STATUS_LABEL_SUCCESS)
+            self.status_label.setText("Текст скопирован в буфер обмена")
@@ -0,0 +1,108 @@
+import os
+import time
+import logging
+import threading
+from utils import cache_path, open_cache_db
+
+
+SAMPLE_RATE = 16000
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_language_cache():
+    # одна база на процесс, как и память переводов: открывается при первом
+    # распознавании языка и используется движками всех заданий
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = LanguageCache()
+        return _shared_cache
+
+
+class LanguageCache:
+    def __init__(self, path=None, max_entries=10000):
+        self.path = path or os.path.join(cache_path('language'), 'languages.sqlite3')
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.connection = open_cache_db(
+            self.path,
+            "CREATE TABLE IF NOT EXISTS languages (audio_hash TEXT PRIMARY KEY, language TEXT, last_used REAL)",
+            "CREATE INDEX IF NOT EXISTS languages_last_used ON languages (last_used)"
+        )
+
+    def get(self, audio_hash):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT language FROM languages WHERE audio_hash = ?", (audio_hash,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE languages SET last_used = ? WHERE audio_hash = ?", (time.time(), audio_hash)
+            )
+            return row[0]
+
+    def put(self, audio_hash, language):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO languages (audio_hash, language, last_used) VALUES (?, ?, ?)",
+                (audio_hash, language, time.time())
+            )
+            self.connection.execute(
+                "DELETE FROM languages WHERE audio_hash NOT IN "
+                "(SELECT audio_hash FROM languages ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+
+class LanguageDetector:
+    def __init__(self, transcribe_model, cache=None, prefix_seconds=30, max_scan_seconds=600):
+        self.transcribe_model = transcribe_model
+        self.cache = cache
+        self.prefix_seconds = prefix_seconds
+        self.max_scan_seconds = max_scan_seconds
+
+    def cached(self, audio_hash):
+        if self.cache is None or audio_hash is None:
+            return None
+        return self.cache.get(audio_hash)
+
+    def speech_prefix(self, audio):
+        import numpy as np
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+        # ищем речь только в начале файла и берем до prefix_seconds ее отсчетов
+        head = audio[:self.max_scan_seconds * SAMPLE_RATE]
+        speech = get_speech_timestamps(head, VadOptions())
+
+        needed = self.prefix_seconds * SAMPLE_RATE
+        parts = []
+        for region in speech:
+            parts.append(head[region['start']:region['end']])
+            needed -= region['end'] - region['start']
+            if needed <= 0:
+                break
+
+        if not parts:
+            return head[:self.prefix_seconds * SAMPLE_RATE]
+        return np.concatenate(parts)[:self.prefix_seconds * SAMPLE_RATE]
+
+    def detect(self, audio, audio_hash):
+        language = self.cached(audio_hash)
+        if language:
+            logging.info(f"Language '{language}' taken from cache")
+            return language
+
+        prefix = self.speech_prefix(audio)
+        if hasattr(self.transcribe_model, 'detect_language'):
+            language, probability, _ = self.transcribe_model.detect_language(prefix)
+        else:
+            _, info = self.transcribe_model.transcribe(prefix)
+            language, probability = info.language, info.language_probability
+
+        logging.info(f"Detected language '{language}' ({probability:.2f}) on {len(prefix) / SAMPLE_RATE:.1f}s prefix")
+        if self.cache is not None and audio_hash is not None:
+            self.cache.put(audio_hash, language)
+        return language
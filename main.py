@@ -1,32 +1,29 @@
-import os
-import logging
-import torch
-from datetime import datetime
-from app import App
-from utils import resource_path
+import sys
+from utils import setup_logging
+from startup_profile import StartupProfiler
 
 
-def setup_logging():
-    log_file = f'{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.log'
-    logs_path = resource_path('logs')
+def option_value(name):
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return None
 
-    if not os.path.exists(logs_path):
-        os.makedirs(logs_path)
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format='[%(asctime)s] - [%(name)s] - [%(levelname)s] - %(message)s',
-        filename=os.path.join(logs_path, log_file),
-        filemode='a'
-    )
-
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(logging.Formatter('[%(asctime)s] - [%(name)s] - [%(levelname)s] - %(message)s'))
-    logging.getLogger().addHandler(console_handler)
+if __name__ == "__main__":
+    if '--service' in sys.argv:
+        # локальный сервис с общими моделями: main.py --service [--port N --max-jobs N ...]
+        from transcription_service import main as service_main
+        sys.exit(service_main([arg for arg in sys.argv[1:] if arg != '--service']))
 
+    profiler = None
+    if '--profile-startup' in sys.argv:
+        profiler = StartupProfiler()
+        profiler.install()
 
-if __name__ == "__main__":
     setup_logging()
-    main_app = App()
+
+    from app import App
+    main_app = App(profiler, service_url=option_value('--connect'))
     main_app.run()
@@ -0,0 +1,63 @@
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from utils import resource_path
+
+
+class Metrics:
+    def __init__(self, path=None):
+        self.path = path
+        self.file = None
+        self.lock = threading.Lock()
+        self.totals = {}
+        self.gauges = {}
+
+    def metrics_path(self):
+        # рядом с текущим логом: <время>.log -> <время>.metrics.jsonl
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, logging.FileHandler):
+                return os.path.splitext(handler.baseFilename)[0] + '.metrics.jsonl'
+        return os.path.join(resource_path('logs'), f'{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.metrics.jsonl')
+
+    def write(self, record):
+        if self.file is None:
+            self.path = self.path or self.metrics_path()
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.file = open(self.path, 'a', encoding='utf-8', buffering=1)
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def record(self, stage, seconds, **fields):
+        with self.lock:
+            count, total = self.totals.get(stage, (0, 0.0))
+            self.totals[stage] = (count + 1, total + seconds)
+            try:
+                self.write({'ts': round(time.time(), 3), 'stage': stage, 'seconds': round(seconds, 5), **fields})
+            except OSError as e:
+                logging.warning(f"Failed to write metrics: {e}")
+
+    def gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+            try:
+                self.write({'ts': round(time.time(), 3), 'gauge': name, 'value': value})
+            except OSError as e:
+                logging.warning(f"Failed to write metrics: {e}")
+
+    @contextmanager
+    def stage(self, name, **fields):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started, **fields)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.totals), dict(self.gauges)
+
+
+metrics = Metrics()
@@ -1,27 +1,52 @@
-from faster_whisper import WhisperModel
+import os
 from PyQt6.QtCore import QThread, pyqtSignal
 
 
 class ModelLoaderThread(QThread):
+    progress_signal = pyqtSignal(str, str)
     finished_signal = pyqtSignal(object)
     error_signal = pyqtSignal(str)
 
-    def __init__(self, model_path, device="cpu", compute_type="float32", cpu_threads=3):
+    def __init__(self, model_path, device="cpu", compute_type="float32", cpu_threads=3, num_workers=1):
         super().__init__()
         self.model_path = model_path
         self.device = device
         self.compute_type = compute_type
         self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+
+    def settings(self):
+        return {
+            'device': self.device,
+            'compute_type': self.compute_type,
+            'cpu_threads': self.cpu_threads,
+            'num_workers': self.num_workers
+        }
 
     def run(self):
         try:
+            self.progress_signal.emit("Проверка модели...", os.path.basename(self.model_path))
+            if not os.path.exists(os.path.join(self.model_path, 'model.bin')):
+                raise FileNotFoundError(f"Отсутствует модель распознавания:\n{self.model_path}")
+
+            size_mb = os.path.getsize(os.path.join(self.model_path, 'model.bin')) / 2**20
+            self.progress_signal.emit("Загрузка библиотек распознавания...", "")
+            from faster_whisper import WhisperModel
+
+            self.progress_signal.emit(
+                "Загрузка весов модели...",
+                f"{size_mb:.0f} МБ, {self.compute_type}, потоков: {self.cpu_threads} × {self.num_workers}"
+            )
             model = WhisperModel(
                 model_size_or_path=self.model_path,
                 device=self.device,
                 compute_type=self.compute_type,
                 cpu_threads=self.cpu_threads,
+                num_workers=self.num_workers,
                 local_files_only=True
             )
+
+            self.progress_signal.emit("Модель загружена", "")
             self.finished_signal.emit(model)
         except Exception as e:
-            self.error_signal.emit(str(e))
\ No newline at end of file
+            self.error_signal.emit(str(e))
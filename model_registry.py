@@ -0,0 +1,36 @@
+import os
+from utils import resource_path
+
+
+def resolve_model_path(model):
+    if os.path.isdir(model):
+        return model
+    return os.path.join(resource_path('repo'), 'Systran', model)
+
+
+def available_transcribe_models():
+    models_meta = {
+        "Systran": [
+            ("tiny ~ 1.5 Гб - самый быстрый ", "faster-whisper-tiny"),
+            ("smallest ~ 2 Гб - быстрый ", "faster-whisper-base"),
+            ("small ~ 3 Гб - скорость + качество", "faster-whisper-small"),
+            ("medium ~ 4 Гб - качество", "faster-whisper-medium"),
+            ("large v2 ~ 5 Гб - лучшее качество ", "faster-whisper-large-v2")
+        ]
+    }
+    return {
+        provider: [
+            (desc, os.path.join(resource_path('repo'), provider, name))
+            for desc, name in models
+            if name in os.listdir(os.path.join(resource_path('repo'), provider))
+        ]
+        for provider, models in models_meta.items()
+    }
+
+
+def available_translate_models(provider='Helsinki-NLP'):
+    model_paths = {}
+    for m in os.listdir(os.path.join(resource_path('repo'), provider)):
+        from_lang, to_lang = m.split('-', maxsplit=1)
+        model_paths[(from_lang, to_lang)] = os.path.join(resource_path('repo'), provider, m)
+    return model_paths
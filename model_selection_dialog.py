@@ -1,19 +1,31 @@
 from utils import resource_path
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout,
+    QLabel, QComboBox, QPushButton, QSpinBox
+)
 from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import QSettings, pyqtSignal
+from calibration_thread import CalibrationThread
+import inference_tuning
 
 
 class ModelSelectionDialog(QDialog):
+    calibration_started = pyqtSignal()
+
     def __init__(self, available_transcribe_models, parent=None):
         super().__init__(parent)
         self.available_transcribe_models = available_transcribe_models
         self.selected_model = None
         self.provider = None
+        self.settings = QSettings("tr-tr", "TrTr")
+        self.calibration_thread = None
+        self.calibrating = False
+        self.preload_thread = None
         self.init_ui()
 
     def init_ui(self):
         self.setWindowTitle("Настройки")
-        self.setFixedSize(400, 150)
+        self.setFixedSize(400, 310)
         self.setWindowIcon(QIcon(resource_path("icon.ico")))
         layout = QVBoxLayout()
 
@@ -26,6 +38,45 @@ class ModelSelectionDialog(QDialog):
                 self.model_combo.addItem(name, (provider, model_path))
         layout.addWidget(self.model_combo)
 
+        inference_layout = QFormLayout()
+
+        self.compute_type_combo = QComboBox()
+        self.compute_type_combo.addItem("Авто", "")
+        for compute_type in ("int8", "int16", "float32"):
+            self.compute_type_combo.addItem(compute_type, compute_type)
+        index = self.compute_type_combo.findData(self.settings.value('compute_type', ''))
+        self.compute_type_combo.setCurrentIndex(max(index, 0))
+        inference_layout.addRow("Точность вычислений:", self.compute_type_combo)
+
+        self.cpu_threads_spin = QSpinBox()
+        self.cpu_threads_spin.setRange(0, 256)
+        self.cpu_threads_spin.setSpecialValueText("Авто")
+        self.cpu_threads_spin.setValue(int(self.settings.value('cpu_threads', 0)))
+        inference_layout.addRow("Потоков процессора:", self.cpu_threads_spin)
+
+        self.num_workers_spin = QSpinBox()
+        self.num_workers_spin.setRange(1, 64)
+        self.num_workers_spin.setToolTip("Сколько фрагментов длинного файла распознавать одновременно")
+        self.num_workers_spin.setValue(int(self.settings.value('num_workers', 1)))
+        inference_layout.addRow("Параллельных фрагментов:", self.num_workers_spin)
+
+        layout.addLayout(inference_layout)
+
+        calibration_layout = QHBoxLayout()
+        self.calibration_label = QLabel()
+        self.calibration_label.setWordWrap(True)
+        self.calibration_label.setStyleSheet("color: gray; font-size: 10px;")
+        calibration_layout.addWidget(self.calibration_label, 1)
+
+        self.calibrate_button = QPushButton("Подобрать")
+        self.calibrate_button.setToolTip("Замерить скорость вариантов на этом компьютере и запомнить лучший")
+        self.calibrate_button.clicked.connect(self.start_calibration)
+        calibration_layout.addWidget(self.calibrate_button)
+        layout.addLayout(calibration_layout)
+
+        self.model_combo.currentIndexChanged.connect(self.update_calibration_label)
+        self.update_calibration_label()
+
         button_layout = QHBoxLayout()
 
         self.ok_button = QPushButton("Да")
@@ -39,10 +90,77 @@ class ModelSelectionDialog(QDialog):
         layout.addLayout(button_layout)
         self.setLayout(layout)
 
+    def select_model(self, model_path):
+        for i in range(self.model_combo.count()):
+            if self.model_combo.itemData(i)[1] == model_path:
+                self.model_combo.setCurrentIndex(i)
+                return True
+        return False
+
+    def update_calibration_label(self):
+        if self.model_combo.currentData() is None:
+            return
+
+        best = inference_tuning.saved_settings(self.model_combo.currentData()[1])
+        if best:
+            self.calibration_label.setText(
+                f"Подобрано: {best['device']}, {best['compute_type']}, потоков: {best['cpu_threads']}"
+            )
+        else:
+            self.calibration_label.setText("Параметры не подобраны")
+
+    def set_preload_thread(self, thread):
+        # пока грузится спекулятивная модель, подбор загрузил бы рядом с ней еще одну
+        self.preload_thread = thread
+        thread.finished.connect(self.update_calibrate_button)
+        self.update_calibrate_button()
+
+    def preload_running(self):
+        return self.preload_thread is not None and self.preload_thread.isRunning()
+
+    def update_calibrate_button(self):
+        self.calibrate_button.setEnabled(not self.calibrating and not self.preload_running())
+
+    def start_calibration(self):
+        if self.model_combo.currentData() is None or self.preload_running():
+            return
+
+        self.calibrating = True
+        self.update_calibrate_button()
+        self.ok_button.setEnabled(False)
+        self.calibration_started.emit()
+        self.calibration_thread = CalibrationThread(self.model_combo.currentData()[1])
+        self.calibration_thread.progress_signal.connect(self.calibration_label.setText)
+        self.calibration_thread.finished_signal.connect(self.calibration_finished)
+        self.calibration_thread.error_signal.connect(self.calibration_failed)
+        self.calibration_thread.start()
+
+    def calibration_finished(self, best):
+        self.calibrating = False
+        self.update_calibrate_button()
+        self.ok_button.setEnabled(True)
+        self.update_calibration_label()
+
+    def calibration_failed(self, error_msg):
+        self.calibrating = False
+        self.update_calibrate_button()
+        self.ok_button.setEnabled(True)
+        self.calibration_label.setText(f"Не удалось подобрать параметры: {error_msg}")
+
+    def inference_overrides(self):
+        return {
+            'compute_type': self.compute_type_combo.currentData() or None,
+            'cpu_threads': self.cpu_threads_spin.value() or None,
+            'num_workers': self.num_workers_spin.value()
+        }
+
     def accept_selection(self):
         provider, model_path = self.model_combo.currentData()
         self.selected_model = model_path
         self.provider = provider
+        self.settings.setValue('compute_type', self.compute_type_combo.currentData())
+        self.settings.setValue('cpu_threads', self.cpu_threads_spin.value())
+        self.settings.setValue('num_workers', self.num_workers_spin.value())
         self.accept()
 
     def get_selected_model(self):
@@ -0,0 +1,461 @@
+import os
+import queue
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from utils import format_seconds, format_segment, file_hash
+from translation import CachedTranslator, JobTranslator, MemoryStats
+from translation_batcher import TranslationBatcher
+from checkpoint_journal import CheckpointJournal
+from metrics import metrics
+from language_detection import LanguageDetector, shared_language_cache
+from chunked_transcriber import ChunkedTranscriber, ChunkSegment, SAMPLE_RATE
+from wav_tail import WavTail, TailTranscriber
+
+
+_END = object()
+
+
+class ProcessingEngine:
+    SEGMENT_QUEUE_SIZE = 64
+    RESULT_QUEUE_SIZE = 8
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, audio_file, target_langs, transcribe_model, save_dir, translation,
+                 on_progress=None, on_segment=None, on_finished=None, on_error=None,
+                 transcribe_mode='sequential', transcribe_workers=1, batch_size=8, audio_cache=None,
+                 language=None, model_path=None, language_cache=True):
+        self.audio_file = audio_file
+        self.target_langs = target_langs
+        self.transcribe_model = transcribe_model
+        self.model_path = model_path
+        self.transcribe_mode = transcribe_mode
+        self.transcribe_workers = transcribe_workers
+        self.batch_size = batch_size
+        self.audio_cache = audio_cache
+        self.language_override = language
+        self.language_cache = language_cache
+        self.save_dir = save_dir
+        self.segments = []
+        self.duration = 0.0
+        self.language = None
+        self.translation = translation
+        self.on_progress = on_progress or (lambda message: None)
+        self.on_segment = on_segment or (lambda start, end, text, translations: None)
+        self.on_finished = on_finished or (lambda segments, txt_filename: None)
+        self.on_error = on_error or (lambda message: None)
+        self.journal = None
+        self.pinned_models = []
+        self.stage_errors = []
+        self.aborted = threading.Event()
+        self.tail_transcriber = None
+        self.memory_stats = MemoryStats()
+        self._is_running = True
+
+    def is_running(self):
+        return self._is_running
+
+    def run(self):
+        try:
+            if not self.audio_file or not os.path.exists(self.audio_file):
+                self.on_error(f"Аудио файл недоступен: {self.audio_file}")
+                return
+
+            if not self._is_running:
+                return
+
+            if self.transcribe_mode == 'follow':
+                # файл еще записывается: хэш и продолжение с контрольной точки не имеют смысла
+                audio_hash = None
+                resume_from, resume_language = 0.0, None
+            else:
+                audio_hash = file_hash(self.audio_file)
+                resume_from, resume_language = self.restore_checkpoint(audio_hash)
+
+            transcribe_options = {}
+            if resume_from:
+                transcribe_options['clip_timestamps'] = [resume_from]
+                self.on_progress(f"Продолжение с {format_seconds(resume_from)}...")
+                logging.info(f"Resuming {self.audio_file} from {resume_from:.2f}s")
+
+            with metrics.stage('audio_decode', audio_file=os.path.basename(self.audio_file)):
+                audio = self.load_audio()
+
+            language = self.language_override or resume_language
+            if language is None:
+                self.on_progress("Распознавание языка...")
+                logging.info("Распознавание языка...")
+                with metrics.stage('language_detection', audio_file=os.path.basename(self.audio_file)):
+                    audio, language = self.detect_language(audio, audio_hash)
+
+            transcribe_options['language'] = language
+            self.language = language
+
+            if not self._is_running:
+                return
+
+            self.on_progress(f"Распознан язык '{language}'")
+            logging.info(f"Распознан язык '{language}'")
+
+            # модели перевода загружаются, пока распознавание готовит первый сегмент
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix='translation-load') as executor:
+                translation_models = executor.submit(self.load_translation_models, language)
+
+                with metrics.stage('transcribe_setup', audio_file=os.path.basename(self.audio_file)):
+                    segments, info = self.transcribe(audio, transcribe_options)
+                self.duration = getattr(info, 'duration', 0.0)
+
+                translate_model_seq = translation_models.result()
+
+            if translate_model_seq is None or not self._is_running:
+                return
+
+            self.on_progress("Сегментация...")
+
+            self.journal = CheckpointJournal(self.checkpoint_path()).open(append=bool(resume_from))
+            if not resume_from:
+                self.journal.write_header(
+                    file_hash=audio_hash,
+                    language=language,
+                    **self.checkpoint_settings()
+                )
+            batcher = TranslationBatcher(translate_model_seq)
+            self.run_pipeline(segments, batcher)
+
+            if self.stage_errors:
+                raise self.stage_errors[0]
+
+            if self._is_running:
+                with metrics.stage('save_results', segments=len(self.segments)):
+                    txt_filename = self.save_results()
+                if txt_filename is not None:
+                    # результат сохранен, продолжать с контрольной точки больше нечего
+                    self.journal.remove()
+                self._is_running = False
+                self.on_finished(self.segments, txt_filename)
+
+        except Exception as e:
+            logging.error(f"Processing failed: {e}")
+            self.on_error(str(e))
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+            if getattr(self.translation, 'memory', None) is not None:
+                logging.info(
+                    f"Translation memory: {self.memory_stats.hits} hits, "
+                    f"{self.memory_stats.misses} misses for {self.audio_file}"
+                )
+            for key in self.pinned_models:
+                self.translation.unpin(key)
+            self.pinned_models = []
+
+    def create_language_detector(self):
+        cache = shared_language_cache() if self.language_cache else None
+        return LanguageDetector(self.transcribe_model, cache=cache)
+
+    def detect_language(self, audio, audio_hash):
+        language_detector = self.create_language_detector()
+        if self.transcribe_mode == 'follow':
+            return audio, self.follow_transcriber().detect_language(language_detector)
+
+        language = language_detector.cached(audio_hash)
+        if language:
+            return audio, language
+
+        if isinstance(audio, str):
+            from faster_whisper import decode_audio
+
+            # декодированное аудио переиспользуется основным распознаванием
+            audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
+        return audio, language_detector.detect(audio, audio_hash)
+
+    def load_translation_models(self, language):
+        translate_model_seq = {}
+        for target_lang in self.target_langs:
+            if not self._is_running:
+                return None
+
+            langs = language + target_lang
+            langs_seq = langs.split('-')
+
+            if len(langs_seq) < 2:
+                continue
+
+            model_seq = []
+            for i in range(len(langs_seq) - 1):
+                left = langs_seq[i]
+                right = langs_seq[i + 1]
+
+                self.on_progress(
+                    f"Загрузка переводчика с '{left}' на '{right}'..."
+                )
+                logging.info(f"Загрузка переводчика с '{left}' на '{right}'...")
+                with metrics.stage('translation_model_load', pair=f'{left}-{right}'):
+                    model = self.translation.load_translation_model(left, right, pin=True)
+
+                if model is None:
+                    model_seq = []
+                    break
+
+                self.pinned_models.append((left, right))
+                if isinstance(model, CachedTranslator):
+                    model = JobTranslator(model, self.memory_stats)
+                model_seq.append(model)
+
+            if model_seq:
+                translate_model_seq[langs] = model_seq
+
+        return translate_model_seq
+
+    def load_audio(self):
+        # без кэша faster-whisper декодирует файл сам
+        if self.audio_cache is None or self.transcribe_mode == 'follow':
+            return self.audio_file
+
+        try:
+            return self.audio_cache.load(self.audio_file)
+        except Exception as e:
+            logging.warning(f"Decoded audio cache unavailable for {self.audio_file}: {e}")
+            return self.audio_file
+
+    def transcribe(self, audio, transcribe_options):
+        if self.transcribe_mode == 'chunked':
+            transcriber = ChunkedTranscriber(
+                self.transcribe_model, workers=self.transcribe_workers, is_running=self.active
+            )
+            return transcriber.transcribe(audio, **transcribe_options)
+
+        if self.transcribe_mode == 'batched':
+            return self.transcribe_batched(audio, transcribe_options)
+
+        if self.transcribe_mode == 'follow':
+            return self.follow_transcriber().transcribe(**transcribe_options)
+
+        return self.transcribe_model.transcribe(audio, **transcribe_options)
+
+    def follow_transcriber(self):
+        if self.tail_transcriber is None:
+            self.tail_transcriber = TailTranscriber(
+                self.transcribe_model, WavTail(self.audio_file), is_running=self.active
+            )
+        return self.tail_transcriber
+
+    def transcribe_batched(self, audio, transcribe_options):
+        from faster_whisper import BatchedInferencePipeline, decode_audio
+
+        pipeline = BatchedInferencePipeline(model=self.transcribe_model)
+        clip_timestamps = transcribe_options.pop('clip_timestamps', None)
+        if not clip_timestamps:
+            return pipeline.transcribe(audio, batch_size=self.batch_size, **transcribe_options)
+
+        # пакетный режим понимает clip_timestamps иначе, поэтому продолжение
+        # делается обрезкой аудио и сдвигом меток времени
+        offset = clip_timestamps[0]
+        if isinstance(audio, str):
+            audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
+        audio = audio[int(offset * SAMPLE_RATE):]
+        segments, info = pipeline.transcribe(audio, batch_size=self.batch_size, **transcribe_options)
+        return (
+            ChunkSegment(segment.start + offset, segment.end + offset, segment.text)
+            for segment in segments
+        ), info
+
+    def active(self):
+        return self._is_running and not self.aborted.is_set()
+
+    def put(self, q, item):
+        while self.active():
+            try:
+                q.put(item, timeout=self.POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run_pipeline(self, segments, batcher):
+        # распознавание -> перевод -> сохранение, стадии связаны ограниченными
+        # очередями, поэтому быстрая стадия ждет медленную, а не копит память
+        segment_queue = queue.Queue(maxsize=self.SEGMENT_QUEUE_SIZE)
+        result_queue = queue.Queue(maxsize=self.RESULT_QUEUE_SIZE)
+
+        stages = [
+            threading.Thread(
+                target=self.run_stage, args=(self.transcription_stage, segments, segment_queue),
+                name='transcription', daemon=True
+            ),
+            threading.Thread(
+                target=self.run_stage, args=(self.translation_stage, batcher, segment_queue, result_queue),
+                name='translation', daemon=True
+            ),
+        ]
+        for stage in stages:
+            stage.start()
+
+        try:
+            self.run_stage(self.persistence_stage, result_queue)
+        finally:
+            for stage in stages:
+                stage.join()
+
+    def run_stage(self, stage, *args):
+        try:
+            stage(*args)
+        except Exception as e:
+            logging.error(f"Pipeline stage {stage.__name__} failed: {e}")
+            self.stage_errors.append(e)
+            self.aborted.set()
+
+    def transcription_stage(self, segments, segment_queue):
+        started = time.perf_counter()
+        for i, segment in enumerate(segments):
+            metrics.record('decode', time.perf_counter() - started, segment=i, start=segment.start, end=segment.end)
+
+            if not self.active():
+                return
+
+            self.on_progress(f"Преобразование сегмента {i+1}...")
+
+            text = segment.text.strip() if segment.text else ""
+            if not self.put(segment_queue, (segment.start, segment.end, text)):
+                return
+
+            metrics.gauge('segment_queue', segment_queue.qsize())
+            started = time.perf_counter()
+
+        self.put(segment_queue, _END)
+
+    def translation_stage(self, batcher, segment_queue, result_queue):
+        while self.active():
+            try:
+                item = segment_queue.get(timeout=self.POLL_INTERVAL)
+            except queue.Empty:
+                item = None
+
+            if item is _END:
+                if len(batcher):
+                    self.flush_batch(batcher, result_queue)
+                self.put(result_queue, _END)
+                return
+
+            if item is not None:
+                batcher.add(*item)
+
+            if batcher.is_due():
+                if not self.flush_batch(batcher, result_queue):
+                    return
+
+    def flush_batch(self, batcher, result_queue):
+        self.on_progress(f"Перевод сегментов ({len(batcher)})...")
+        with metrics.stage('translation_batch', segments=len(batcher)):
+            batch = batcher.flush()
+
+        if not self.put(result_queue, batch):
+            return False
+
+        metrics.gauge('result_queue', result_queue.qsize())
+        return True
+
+    def persistence_stage(self, result_queue):
+        while self.active():
+            try:
+                item = result_queue.get(timeout=self.POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+            if item is _END:
+                return
+
+            self.publish_segments(item)
+
+    def publish_segments(self, segments):
+        with metrics.stage('checkpoint', segments=len(segments)):
+            for start, end, text, translations in segments:
+                self.segments.append((start, end, text, translations))
+                self.journal.append(start, end, text, translations)
+                self.on_segment(start, end, text, translations)
+
+        if segments and self._is_running:
+            self.on_progress(f"Обработаные сегменты сохранены в {self.journal.path}...")
+
+    def stop(self):
+        self._is_running = False
+
+    def checkpoint_path(self):
+        # одноименные файлы из разных каталогов ведут разные журналы
+        name = os.path.basename(self.audio_file).replace('.', '_')
+        path_hash = hashlib.sha1(os.path.abspath(self.audio_file).encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self.save_dir, f'.{name}-{path_hash}.jsonl')
+
+    def checkpoint_settings(self):
+        # продолжать можно только тем же распознаванием: другая модель или режим
+        # дали бы текст, склеенный из двух разных результатов
+        settings = {
+            'target_langs': self.target_langs,
+            'model_path': self.model_path,
+            'transcribe_mode': self.transcribe_mode,
+        }
+        if self.transcribe_mode == 'batched':
+            # размер пакета влияет на результат только в пакетном режиме
+            settings['batch_size'] = self.batch_size
+        return settings
+
+    def restore_checkpoint(self, audio_hash):
+        path = self.checkpoint_path()
+        header = CheckpointJournal.read_header(path)
+        if header is None:
+            return 0.0, None
+
+        settings = self.checkpoint_settings()
+        if header.get('file_hash') != audio_hash \
+                or any(header.get(key) != value for key, value in settings.items()) \
+                or (self.language_override and header.get('language') != self.language_override):
+            logging.info(f"Checkpoint {path} belongs to another file or settings, starting over")
+            return 0.0, None
+
+        segments = CheckpointJournal.read(path)
+        if not segments:
+            return 0.0, None
+
+        # переписываем журнал без возможной оборванной последней строки
+        journal = CheckpointJournal(path).open()
+        journal.write_header(**{k: v for k, v in header.items() if k != 'type'})
+        for segment in segments:
+            journal.append(*segment)
+        journal.close()
+
+        for start, end, text, translations in segments:
+            self.segments.append((start, end, text, translations))
+            self.on_segment(start, end, text, translations)
+
+        logging.info(f"Restored {len(segments)} segments from {path}")
+        return segments[-1][1], header.get('language')
+
+    def save_results(self):
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+        name = os.path.basename(self.audio_file).replace('.', '_')
+        filename = os.path.join(self.save_dir, f'{name}_{timestamp}.txt')
+
+        if self.journal is not None:
+            self.journal.close()
+            segments = CheckpointJournal.read(self.journal.path)
+        else:
+            segments = self.segments
+
+        try:
+            with open(filename, 'w', encoding='utf-8') as f:
+                if not segments:
+                    f.write("Речь в аудио не распознана\n")
+                    return filename
+
+                for segment in segments:
+                    f.write(format_segment(*segment))
+
+            logging.info(f"Results saved to: {filename}")
+
+            return filename
+        except Exception as e:
+            logging.error(f"Failed to save file: {e}")
+            return None
@@ -0,0 +1,52 @@
+import os
+from processing_thread import ProcessingThread
+from remote_processing_thread import RemoteProcessingThread
+from segment_list_model import SegmentListModel
+
+
+class ProcessingJob:
+    STATUS_TITLES = {
+        'queued': "в очереди",
+        'running': "обработка",
+        'finished': "готово",
+        'error': "ошибка",
+        'cancelled': "отменено",
+    }
+
+    def __init__(self, audio_file, target_langs, **options):
+        self.audio_file = audio_file
+        self.target_langs = target_langs
+        self.options = options
+        self.status = 'queued'
+        self.message = ""
+        self.txt_filename = None
+        self.language = None
+        self.thread = None
+        # у каждого задания свой список результатов, контрольная точка
+        # ведется движком отдельно для каждого файла
+        self.results_model = SegmentListModel()
+
+    def title(self):
+        return f"{os.path.basename(self.audio_file)} — {self.STATUS_TITLES[self.status]}"
+
+    def is_running(self):
+        return self.status == 'running'
+
+    def create_thread(self, transcribe_model, translation, save_dir, service_client=None, audio_cache=None):
+        if service_client is not None:
+            # модель и число исполнителей задает сервис
+            options = {
+                key: value for key, value in self.options.items()
+                if key not in ('transcribe_workers', 'model_path')
+            }
+            return RemoteProcessingThread(service_client, self.audio_file, self.target_langs, **options)
+
+        return ProcessingThread(
+            self.audio_file,
+            self.target_langs,
+            transcribe_model,
+            save_dir,
+            translation,
+            audio_cache=audio_cache,
+            **self.options
+        )
@@ -0,0 +1,80 @@
+import logging
+from PyQt6.QtCore import QThread, pyqtSignal
+from service_client import ServiceError
+
+
+class RemoteProcessingThread(QThread):
+    # тот же интерфейс, что у ProcessingThread, но файл обрабатывает локальный сервис;
+    # результаты сохраняются в каталог сервиса, путь приходит в finished_processing
+    progress_updated = pyqtSignal(str)
+    segment_processed = pyqtSignal(float, float, str, dict)
+    finished_processing = pyqtSignal(list, str)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, service_client, audio_file, target_langs, **job_options):
+        super().__init__()
+        self.service_client = service_client
+        self.audio_file = audio_file
+        self.target_langs = target_langs
+        self.job_options = {key: value for key, value in job_options.items() if value is not None}
+        self.job_id = None
+        self.segments = []
+        self.language = None
+        self._is_running = True
+
+    def run(self):
+        try:
+            job = self.service_client.submit(self.audio_file, self.target_langs, **self.job_options)
+            self.job_id = job['id']
+            if not self._is_running:
+                self.service_client.cancel(self.job_id)
+            self.progress_updated.emit(f"Задание {self.job_id} поставлено в очередь сервиса...")
+
+            for event in self.service_client.events(self.job_id):
+                if self.handle_event(event):
+                    return
+
+            raise ServiceError(f"Сервис завершил поток задания {self.job_id} без результата")
+        except ServiceError as e:
+            logging.error(f"Service job failed: {e}")
+            if self._is_running:
+                self.error_occurred.emit(str(e))
+        except (KeyError, TypeError) as e:
+            logging.error(f"Unexpected service response: {e}")
+            if self._is_running:
+                self.error_occurred.emit(f"Некорректный ответ сервиса: {e}")
+        finally:
+            self._is_running = False
+
+    def handle_event(self, event):
+        # True - задание завершено
+        if event['type'] == 'progress':
+            if self._is_running:
+                self.progress_updated.emit(event['message'])
+        elif event['type'] == 'segment':
+            segment = (event['start'], event['end'], event['text'], event['translations'])
+            self.segments.append(segment)
+            if self._is_running:
+                self.segment_processed.emit(*segment)
+        elif event['type'] == 'finished':
+            self.language = event.get('language')
+            self._is_running = False
+            self.finished_processing.emit(self.segments, event.get('txt_filename') or "")
+            return True
+        elif event['type'] == 'error':
+            self._is_running = False
+            self.error_occurred.emit(event['message'])
+            return True
+        elif event['type'] == 'cancelled':
+            if self._is_running:
+                self.error_occurred.emit(f"Задание {self.job_id} отменено на сервисе")
+            return True
+        return False
+
+    def stop(self):
+        self._is_running = False
+        if self.job_id is not None:
+            try:
+                self.service_client.cancel(self.job_id)
+            except ServiceError as e:
+                logging.warning(f"Failed to cancel service job {self.job_id}: {e}")
@@ -0,0 +1,64 @@
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from utils import format_segment
+
+
+class SegmentListModel(QAbstractListModel):
+    SegmentRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.segments = []
+        self.editable = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.segments)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        start, end, text, translations = self.segments[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return format_segment(start, end, text, translations)
+        if role == Qt.ItemDataRole.EditRole:
+            return text
+        if role == self.SegmentRole:
+            return self.segments[index.row()]
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+
+        start, end, _, translations = self.segments[index.row()]
+        self.segments[index.row()] = (start, end, value, translations)
+        self.dataChanged.emit(index, index)
+        return True
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if self.editable:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def set_editable(self, editable):
+        self.editable = editable
+
+    def add_segments(self, segments):
+        if not segments:
+            return
+        row = len(self.segments)
+        self.beginInsertRows(QModelIndex(), row, row + len(segments) - 1)
+        self.segments.extend(segments)
+        self.endInsertRows()
+
+    def add_segment(self, start, end, text, translations):
+        self.add_segments([(start, end, text, translations)])
+
+    def clear(self):
+        self.beginResetModel()
+        self.segments = []
+        self.endResetModel()
+
+    def to_plain_text(self):
+        return ''.join(format_segment(*segment) for segment in self.segments)
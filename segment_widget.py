@@ -1,9 +1,20 @@
-from PyQt6.QtWidgets import QVBoxLayout, QWidget, QLabel
+from html import escape
+from PyQt6.QtWidgets import QVBoxLayout, QWidget, QLabel, QStyledItemDelegate, QStyle, QPlainTextEdit
+from PyQt6.QtGui import QTextDocument, QPalette
+from PyQt6.QtCore import Qt, QSize, QRectF
+from segment_list_model import SegmentListModel
 
-from styles import (
-    TIMESTAMP_LABEL,
-    SEGMENT_WIDGET
-)
+from styles import SEGMENT_WIDGET
+
+
+def segment_html(start, end, text, translations):
+    # одна разметка сегмента для SegmentWidget и SegmentDelegate
+    html = f'<p style="color: #424242; font-size: 12px; font-weight: bold;">[{start:.2f}s - {end:.2f}s]</p>'
+    if text:
+        html += f'<p>Речь: {escape(text)}</p>'
+    for target_lang, translated_text in translations.items():
+        html += f'<p style="color: #2c5aa0;">Перевод ({escape(target_lang)}): {escape(translated_text)}</p>'
+    return html
 
 
 class SegmentWidget(QWidget):
@@ -15,21 +26,80 @@ class SegmentWidget(QWidget):
         layout = QVBoxLayout()
         layout.setContentsMargins(10, 10, 10, 10)
 
-        timestamp_label = QLabel(f"[{start:.2f}s - {end:.2f}s]")
-        timestamp_label.setStyleSheet(TIMESTAMP_LABEL)
-        layout.addWidget(timestamp_label)
-
-        if text:
-            text_label = QLabel(f"Речь: {text}")
-            text_label.setWordWrap(True)
-            text_label.setStyleSheet("margin: 5px 0px;")
-            layout.addWidget(text_label)
-
-        for target_lang, translated_text in translations.items():
-            translation_label = QLabel(f"Перевод ({target_lang}): {translated_text}")
-            translation_label.setWordWrap(True)
-            translation_label.setStyleSheet("margin: 5px 0px; color: #2c5aa0;")
-            layout.addWidget(translation_label)
+        segment_label = QLabel(segment_html(start, end, text, translations))
+        segment_label.setTextFormat(Qt.TextFormat.RichText)
+        segment_label.setWordWrap(True)
+        layout.addWidget(segment_label)
 
         self.setLayout(layout)
         self.setStyleSheet(SEGMENT_WIDGET)
+
+
+class SegmentDelegate(QStyledItemDelegate):
+    # Рисует сегмент разметкой segment_html, как SegmentWidget, но без создания
+    # виджета на каждую строку: QListView запрашивает только видимые строки.
+    MARGIN = 10
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.size_cache = {}
+        self.cache_width = None
+
+    def view_width(self, option):
+        view = self.parent()
+        return view.viewport().width() if view is not None else option.rect.width()
+
+    def document(self, option, index, width):
+        document = QTextDocument()
+        document.setDefaultFont(option.font)
+        document.setHtml(segment_html(*index.data(SegmentListModel.SegmentRole)))
+        document.setTextWidth(max(width - 2 * self.MARGIN, 100))
+        return document
+
+    def paint(self, painter, option, index):
+        painter.save()
+
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.color(QPalette.ColorRole.AlternateBase))
+
+        painter.setPen(Qt.GlobalColor.lightGray)
+        painter.drawLine(option.rect.topLeft(), option.rect.topRight())
+
+        document = self.document(option, index, option.rect.width())
+        painter.translate(option.rect.left() + self.MARGIN, option.rect.top() + self.MARGIN)
+        document.drawContents(painter, QRectF(0, 0, document.textWidth(), document.size().height()))
+
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        width = self.view_width(option)
+        if width != self.cache_width:
+            # высоты хранятся только для текущей ширины, при ее смене пересчитываются
+            self.size_cache.clear()
+            self.cache_width = width
+
+        row = index.row()
+        if row not in self.size_cache:
+            document = self.document(option, index, width)
+            self.size_cache[row] = QSize(
+                width,
+                int(document.size().height()) + 2 * self.MARGIN
+            )
+        return self.size_cache[row]
+
+    def invalidate(self, row=None):
+        if row is None:
+            self.size_cache.clear()
+        else:
+            self.size_cache.pop(row, None)
+
+    def createEditor(self, parent, option, index):
+        return QPlainTextEdit(parent)
+
+    def setEditorData(self, editor, index):
+        editor.setPlainText(index.data(Qt.ItemDataRole.EditRole))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.toPlainText(), Qt.ItemDataRole.EditRole)
+        self.invalidate(index.row())
+        self.sizeHintChanged.emit(index)
@@ -0,0 +1,63 @@
+import json
+import http.client
+import urllib.request
+import urllib.error
+
+
+class ServiceError(Exception):
+    pass
+
+
+class ServiceClient:
+    def __init__(self, url, timeout=10):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(
+            f'{self.url}{path}', data=data, method=method,
+            headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error', str(e))
+            except ValueError:
+                message = str(e)
+            raise ServiceError(message) from e
+        except urllib.error.URLError as e:
+            raise ServiceError(f"Сервис {self.url} недоступен: {e.reason}") from e
+
+    def jobs(self):
+        return self.request('GET', '/jobs')['jobs']
+
+    def submit(self, audio_file, target_langs, save_dir=None, priority=0, **options):
+        return self.request('POST', '/jobs', dict(
+            audio_file=audio_file,
+            target_langs=target_langs,
+            save_dir=save_dir,
+            priority=priority,
+            **options
+        ))
+
+    def cancel(self, job_id):
+        return self.request('DELETE', f'/jobs/{job_id}')
+
+    def events(self, job_id):
+        # поток NDJSON: по событию на строку, пока задание не завершится
+        try:
+            response = urllib.request.urlopen(f'{self.url}/jobs/{job_id}/events', timeout=None)
+        except urllib.error.URLError as e:
+            raise ServiceError(f"Сервис {self.url} недоступен: {e}") from e
+
+        # обрыв соединения или испорченная строка - та же ошибка сервиса
+        try:
+            with response:
+                for line in response:
+                    if line.strip():
+                        yield json.loads(line)
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise ServiceError(f"Поток событий задания {job_id} прерван: {e}") from e
@@ -1,12 +1,22 @@
 import os
 from PyQt6.QtWidgets import (
     QApplication, QFileDialog,
-    QVBoxLayout, QHBoxLayout, QSplitter,
-    QWidget, QPushButton, QCheckBox, QLabel, QProgressBar,
-    QTextEdit, QMessageBox
+    QVBoxLayout, QHBoxLayout,
+    QWidget, QPushButton, QLabel, QProgressBar, QSpinBox,
+    QListView, QMessageBox
+)
+from PyQt6.QtCore import QTimer, QSettings
+from segment_list_model import SegmentListModel
+from ui_components import (
+    AUDIO_FILE_FILTER,
+    SegmentBuffer,
+    TargetLanguageSelector,
+    create_panels,
+    create_language_combo,
+    create_mode_combo,
+    create_results_view,
+    section_label,
 )
-from PyQt6.QtCore import Qt, QMutex, QWaitCondition
-from utils import format_seconds
 
 
 from styles import (
@@ -14,91 +24,58 @@ from styles import (
     STATUS_LABEL_WARNING,
     STATUS_LABEL_READY,
     STATUS_LABEL_SUCCESS,
-    RESULTS_TEXT,
     EXPORT_BUTTON,
     AUDIO_PATH_LABEL,
     LOGO_LABEL,
     DESC_LABEL,
-    SECTION_LABEL,
     CANCEL_BUTTON,
     PROGRESS_BAR,
     PROGRESS_CARD,
     PROCESS_BUTTON,
-    CHECKBOX,
     SETTINGS_CARD,
     SELECT_AUDIO_BUTTON,
     UPLOAD_CARD,
-    LEFT_PANEL,
 )
 from processing_thread import ProcessingThread
+from remote_processing_thread import RemoteProcessingThread
+from translation_preload_thread import TranslationPreloadThread
+from metrics import metrics
 
 
 class SpeechRecognitionWidget(QWidget):
-    def __init__(self, transcribe_model, translation, save_dir):
+    DEFAULT_SOURCE_LANGUAGE = 'he'
+
+    def __init__(self, transcribe_model, translation, save_dir, service_client=None, audio_cache=None):
         super().__init__()
         self.transcribe_model = transcribe_model
         self.translation = translation
+        self.service_client = service_client
         self.save_dir = save_dir
         self.processing_thread = None
+        self.stop_requested = False
         self.audio_file_path = None
+        self.settings = QSettings("tr-tr", "TrTr")
+        self.preload_thread = None
+        self.preload_pending = False
+        self.audio_cache = audio_cache
 
-        self.segment_queue = []
-        self.segment_mutex = QMutex()
-        self.segment_condition = QWaitCondition()
-        self.processing_segment = False
+        self.segment_buffer = SegmentBuffer(self, self.render_segments)
 
-        self.setup_ui()
+        self.stats_baseline = ({}, {})
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(1000)
+        self.stats_timer.timeout.connect(self.update_stats)
 
-        self.segment_timer = self.startTimer(10)
-
-
-    def timerEvent(self, event):
-        if self.segment_queue and not self.processing_segment:
-            self.process_next_segment()
-
-    def process_next_segment(self):
-        self.segment_mutex.lock()
-        try:
-            if self.segment_queue:
-                self.processing_segment = True
-                segment_data = self.segment_queue.pop(0)
-                self._add_segment_sync(*segment_data)
-        finally:
-            self.segment_mutex.unlock()
-
-    def _add_segment_sync(self, start, end, text, translations):
-        current_text = self.results_text.toHtml()
-        b = format_seconds(start)
-        e = format_seconds(end)
-
-        self.results_text.setHtml(
-            current_text
-            + f'<hr/><b>[{b} - {e}]</b><p>{text}</p>'
-            + ''.join(
-                f"<p><b>({lang})</b> {translation}</p>"
-                for lang, translation in translations.items()
-            )
-        )
+        self.setup_ui()
+        self.preload_translation_models()
 
-        self.processing_segment = False
+    def render_segments(self, segments):
+        with metrics.stage('ui_render', segments=len(segments)):
+            self.results_model.add_segments(segments)
+        self.update_ui_state()
 
     def setup_ui(self):
-        main_splitter = QSplitter(Qt.Orientation.Horizontal)
-        tab_layout = QVBoxLayout(self)
-        tab_layout.addWidget(main_splitter)
-
-        left_panel = QWidget()
-        left_panel.setMaximumWidth(350)
-        left_panel.setStyleSheet(LEFT_PANEL)
-        left_layout = QVBoxLayout(left_panel)
-        left_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-
-        right_panel = QWidget()
-        right_layout = QVBoxLayout(right_panel)
-
-        main_splitter.addWidget(left_panel)
-        main_splitter.addWidget(right_panel)
-        main_splitter.setSizes([300, 900])
+        left_layout, right_layout = create_panels(self)
 
         app_title = QLabel("Полиглот")
         app_title.setStyleSheet(LOGO_LABEL)
@@ -108,9 +85,7 @@ class SpeechRecognitionWidget(QWidget):
         upload_card.setStyleSheet(UPLOAD_CARD)
         upload_layout = QVBoxLayout(upload_card)
 
-        upload_title = QLabel("Аудио:")
-        upload_title.setStyleSheet(SECTION_LABEL)
-        upload_layout.addWidget(upload_title)
+        upload_layout.addWidget(section_label("Аудио:"))
 
         upload_title_description = QLabel("Поддержка 99 языков")
         upload_title_description.setStyleSheet(DESC_LABEL)
@@ -130,24 +105,37 @@ class SpeechRecognitionWidget(QWidget):
         settings_card.setStyleSheet(SETTINGS_CARD)
         settings_layout = QVBoxLayout(settings_card)
 
-        settings_title = QLabel("Дополнительно переводить на")
-        settings_title.setStyleSheet(SECTION_LABEL)
-        settings_layout.addWidget(settings_title)
+        settings_layout.addWidget(section_label("Дополнительно переводить на"))
 
         settings_title_description = QLabel("Языки: he, ar")
         settings_title_description.setStyleSheet(DESC_LABEL)
         settings_title_description.setWordWrap(True)
         #settings_layout.addWidget(settings_title_description)
 
-        self.translate_en = QCheckBox("Английский")
-        self.translate_ru = QCheckBox("Русский")
-        self.translate_en_ru = QCheckBox("Русский (с Английского)")
+        self.target_langs = TargetLanguageSelector(settings_layout, self.preload_translation_models)
+
+        settings_layout.addWidget(section_label("Язык речи"))
+
+        self.language_combo = create_language_combo()
+        self.language_combo.currentIndexChanged.connect(self.preload_translation_models)
+        settings_layout.addWidget(self.language_combo)
 
-        self.translate_en.setChecked(True)
+        settings_layout.addWidget(section_label("Режим распознавания"))
 
-        for checkbox in [self.translate_en, self.translate_ru, self.translate_en_ru]:
-            checkbox.setStyleSheet(CHECKBOX)
-            settings_layout.addWidget(checkbox)
+        self.transcribe_mode_combo = create_mode_combo(follow=True)
+        self.transcribe_mode_combo.setToolTip(
+            "Длинный файл делится по паузам, фрагменты распознаются одновременно "
+            "(число фрагментов задается в настройках при запуске)"
+        )
+        settings_layout.addWidget(self.transcribe_mode_combo)
+
+        self.batch_size_spin = QSpinBox()
+        self.batch_size_spin.setRange(1, 64)
+        self.batch_size_spin.setPrefix("Размер пакета: ")
+        self.batch_size_spin.setValue(int(self.settings.value('batch_size', 8)))
+        self.batch_size_spin.setEnabled(False)
+        self.transcribe_mode_combo.currentIndexChanged.connect(self.update_ui_state)
+        settings_layout.addWidget(self.batch_size_spin)
 
         left_layout.addWidget(settings_card)
         left_layout.addSpacing(5)
@@ -205,39 +193,52 @@ class SpeechRecognitionWidget(QWidget):
 
         right_layout.addWidget(results_header)
 
-        self.results_text = QTextEdit()
-        #self.results_text.setReadOnly(True)
-        self.results_text.setStyleSheet(RESULTS_TEXT)
+        self.results_model = SegmentListModel(self)
+        self.results_view = create_results_view(self.results_model)
 
-        right_layout.addWidget(self.results_text)
+        right_layout.addWidget(self.results_view)
 
         self.status_label = QLabel("Выберите аудиофайл для начала работы")
         right_layout.addWidget(self.status_label)
         right_layout.addWidget(self.progress_bar)
 
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet(DESC_LABEL)
+        self.stats_label.setHidden(True)
+        right_layout.addWidget(self.stats_label)
+
         self.update_ui_state()
 
     def edit_result_text(self):
-        if self.results_text.isReadOnly():
-            self.edit_btn.setText("Отменить редактирование")
+        if not self.results_model.editable:
+            self.edit_btn.setText("Завершить редактирование")
             self.copy_btn.setEnabled(False)
             self.save_btn.setEnabled(False)
             self.process_btn.setEnabled(False)
             self.select_audio_btn.setEnabled(False)
-            self.results_text.setReadOnly(False)
+            self.results_model.set_editable(True)
+            self.results_view.setEditTriggers(
+                QListView.EditTrigger.DoubleClicked | QListView.EditTrigger.EditKeyPressed
+            )
         else:
             self.edit_btn.setText("Изменить")
             self.copy_btn.setEnabled(True)
             self.save_btn.setEnabled(True)
             self.process_btn.setEnabled(True)
             self.select_audio_btn.setEnabled(True)
-            self.results_text.setReadOnly(True)
+            self.results_model.set_editable(False)
+            self.results_view.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
 
     def update_ui_state(self):
         has_audio = self.audio_file_path is not None
-        has_results = len(self.results_text.toPlainText()) > 0
+        has_results = self.results_model.rowCount() > 0
         is_processing = self.processing_thread is not None and self.processing_thread.isRunning()
         self.progress_bar.setHidden(not is_processing)
+        if is_processing and not self.stats_timer.isActive():
+            self.stats_timer.start()
+        elif not is_processing and self.stats_timer.isActive():
+            self.stats_timer.stop()
+            self.update_stats()
         self.status_label.setHidden(not is_processing and not has_results)
         self.process_btn.setEnabled(has_audio and not is_processing)
         self.cancel_btn.setEnabled(is_processing)
@@ -245,15 +246,19 @@ class SpeechRecognitionWidget(QWidget):
         self.save_btn.setEnabled(has_results and not is_processing)
         self.edit_btn.setEnabled(has_results and not is_processing)
         self.select_audio_btn.setEnabled(not is_processing)
-        self.translate_en.setEnabled(not is_processing)
-        self.translate_ru.setEnabled(not is_processing)
+        self.target_langs.setEnabled(not is_processing)
+        self.transcribe_mode_combo.setEnabled(not is_processing)
+        self.language_combo.setEnabled(not is_processing)
+        self.batch_size_spin.setEnabled(
+            not is_processing and self.transcribe_mode_combo.currentData() == 'batched'
+        )
 
     def select_audio_file(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self,
             "Выберите аудио файл",
             "",
-            "Audio Files (*.mp3 *.wav *.m4a *.ogg *.flac *.mp4);;All Files (*)"
+            AUDIO_FILE_FILTER
         )
 
         if file_path:
@@ -269,67 +274,142 @@ class SpeechRecognitionWidget(QWidget):
             QMessageBox.warning(self, "Ошибка", "Пожалуйста, выберите аудио файл")
             return
 
-        if self.transcribe_model is None:
+        if self.transcribe_model is None and self.service_client is None:
             QMessageBox.critical(self, "Ошибка", "Модель транскрипции недоступна")
             return
 
-        target_langs = []
-        if self.translate_en.isChecked():
-            target_langs.append("-en")
-        if self.translate_ru.isChecked():
-            target_langs.append("-ru")
-        if self.translate_en_ru.isChecked():
-            target_langs.append("-en-ru")
+        if self.transcribe_mode_combo.currentData() == 'follow' \
+                and not self.audio_file_path.lower().endswith('.wav'):
+            QMessageBox.warning(self, "Ошибка", "Слежение за записью поддерживается только для WAV файлов")
+            return
+
+        target_langs = self.target_langs.selected()
 
         self.clear_results()
         self.status_label.setStyleSheet(STATUS_LABEL_READY)
         self.status_label.setText("Начало обработки аудио...")
 
-        self.processing_thread = ProcessingThread(
-            self.audio_file_path,
-            target_langs,
-            self.transcribe_model,
-            self.save_dir,
-            self.translation
-        )
+        self.processing_thread = self.create_processing_thread(self.audio_file_path, target_langs)
+        self.settings.setValue('batch_size', self.batch_size_spin.value())
+
+        self.stats_baseline = metrics.snapshot()
+        self.stats_label.setText("")
+        self.stats_label.setHidden(False)
 
         self.processing_thread.progress_updated.connect(self.update_progress)
-        self.processing_thread.segment_processed.connect(self.queue_segment)
+        self.processing_thread.segment_processed.connect(self.segment_buffer.append)
         self.processing_thread.finished_processing.connect(self.processing_finished)
         self.processing_thread.error_occurred.connect(self.processing_error)
+        self.processing_thread.finished.connect(self.processing_thread_finished)
         self.processing_thread.start()
 
         self.update_ui_state()
 
-    def queue_segment(self, start, end, text, translations):
-        self.segment_mutex.lock()
-        try:
-            self.segment_queue.append((start, end, text, translations))
-        finally:
-            self.segment_mutex.unlock()
+    def create_processing_thread(self, audio_file, target_langs):
+        if self.service_client is not None:
+            # модели загружены в локальном сервисе, окно работает как клиент
+            return RemoteProcessingThread(
+                self.service_client,
+                audio_file,
+                target_langs,
+                transcribe_mode=self.transcribe_mode_combo.currentData(),
+                batch_size=self.batch_size_spin.value(),
+                language=self.language_combo.currentData()
+            )
+
+        return ProcessingThread(
+            audio_file,
+            target_langs,
+            self.transcribe_model,
+            self.save_dir,
+            self.translation,
+            transcribe_mode=self.transcribe_mode_combo.currentData(),
+            transcribe_workers=int(self.settings.value('num_workers', 1)),
+            batch_size=self.batch_size_spin.value(),
+            audio_cache=self.audio_cache,
+            language=self.language_combo.currentData(),
+            model_path=self.settings.value('transcribe_model_path', '')
+        )
+
+    def preload_translation_models(self):
+        # модели переводчика грузятся в фоне для языка прошлого файла,
+        # чтобы к началу распознавания они уже были в памяти
+        if self.translation is None:
+            return
+
+        if self.preload_thread is not None and self.preload_thread.isRunning():
+            self.preload_pending = True
+            return
+
+        self.preload_pending = False
+        source_language = (
+            self.language_combo.currentData()
+            or self.settings.value('source_language', self.DEFAULT_SOURCE_LANGUAGE)
+        )
+        self.preload_thread = TranslationPreloadThread(
+            self.translation,
+            source_language,
+            self.target_langs.selected()
+        )
+        self.preload_thread.finished.connect(self.on_preload_finished)
+        self.preload_thread.start()
+
+    def on_preload_finished(self):
+        if self.preload_pending:
+            self.preload_translation_models()
 
     def cancel_processing(self):
         if self.processing_thread and self.processing_thread.isRunning():
             self.status_label.setStyleSheet(STATUS_LABEL_WARNING)
             self.status_label.setText("Останавливается...")
             self.processing_thread.stop()
+            self.stop_requested = True
 
-            self.segment_mutex.lock()
-            try:
-                self.segment_queue.clear()
-                self.processing_segment = False
-            finally:
-                self.segment_mutex.unlock()
+            self.segment_buffer.discard()
+            self.update_ui_state()
 
+    def processing_thread_finished(self):
+        # кнопки снова доступны только после выхода из потока: остановка
+        # дожидается текущего фрагмента распознавания
+        if self.stop_requested:
+            self.stop_requested = False
+            self.segment_buffer.discard()
             self.status_label.setStyleSheet(STATUS_LABEL_WARNING)
             self.status_label.setText("Процесс остановлен пользователем")
-            self.update_ui_state()
+        self.update_ui_state()
+
+    def update_stats(self):
+        totals, gauges = metrics.snapshot()
+        base_totals = self.stats_baseline[0]
+
+        parts = []
+        for stage, title in (
+            ('decode', "Распознавание"),
+            ('translation_batch', "Перевод"),
+            ('checkpoint', "Сохранение"),
+            ('ui_render', "Отображение"),
+        ):
+            count, seconds = totals.get(stage, (0, 0.0))
+            base_count, base_seconds = base_totals.get(stage, (0, 0.0))
+            if count > base_count:
+                average_ms = (seconds - base_seconds) / (count - base_count) * 1000
+                parts.append(f"{title}: {average_ms:.0f} мс × {count - base_count}")
+
+        if 'segment_queue' in gauges or 'result_queue' in gauges:
+            parts.append(f"Очереди: {gauges.get('segment_queue', 0)} / {gauges.get('result_queue', 0)}")
+
+        self.stats_label.setText(" · ".join(parts))
 
     def update_progress(self, message):
         self.status_label.setStyleSheet(STATUS_LABEL_READY)
         self.status_label.setText(message)
 
     def processing_finished(self, segments, txt_filename):
+        self.segment_buffer.flush()
+
+        if self.processing_thread.language:
+            self.settings.setValue('source_language', self.processing_thread.language)
+
         if segments:
             self.status_label.setStyleSheet(STATUS_LABEL_SUCCESS)
             self.status_label.setText(f"Обработка завершена. Результаты сохранены в: {txt_filename}")
@@ -342,29 +422,20 @@ class SpeechRecognitionWidget(QWidget):
         self.status_label.setText(f"Ошибка: {error_message}")
         QMessageBox.critical(self, "Ошибка", f"Во время обработки произошла ошибка:\n{error_message}")
 
-        self.segment_mutex.lock()
-        try:
-            self.segment_queue.clear()
-            self.processing_segment = False
-        finally:
-            self.segment_mutex.unlock()
+        self.segment_buffer.discard()
 
         self.update_ui_state()
 
     def clear_results(self):
-        self.results_text.clear()
+        self.results_model.clear()
+        self.results_view.itemDelegate().invalidate()
 
-        self.segment_mutex.lock()
-        try:
-            self.segment_queue.clear()
-            self.processing_segment = False
-        finally:
-            self.segment_mutex.unlock()
+        self.segment_buffer.discard()
 
         self.update_ui_state()
 
     def copy_results(self):
-        text = self.results_text.toPlainText()
+        text = self.results_model.to_plain_text()
         if text:
             QApplication.clipboard().setText(text)
             self.status_label.setStyleSheet(STATUS_LABEL_SUCCESS)
@@ -374,7 +445,7 @@ class SpeechRecognitionWidget(QWidget):
             self.status_label.setText("Нет текста для копирования")
 
     def save_results(self):
-        text = self.results_text.toPlainText()
+        text = self.results_model.to_plain_text()
         if not text:
             QMessageBox.warning(self, "Предупреждение", "Нет данных для сохранения")
             return
@@ -0,0 +1,80 @@
+import os
+import sys
+import json
+import time
+import logging
+import builtins
+from datetime import datetime
+from utils import resource_path
+
+
+# время до первого окна, которое считается регрессией при превышении
+STARTUP_BUDGET_SECONDS = 3.0
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.import_times = []
+        self.marks = {}
+        self.depth = 0
+        self.original_import = None
+
+    def install(self):
+        self.original_import = builtins.__import__
+        builtins.__import__ = self.timed_import
+
+    def uninstall(self):
+        if self.original_import is not None:
+            builtins.__import__ = self.original_import
+            self.original_import = None
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self.original_import(name, globals, locals, fromlist, level)
+
+        self.depth += 1
+        started = time.perf_counter()
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            self.depth -= 1
+            self.import_times.append((name, time.perf_counter() - started, self.depth))
+
+    def mark(self, name):
+        self.marks[name] = time.perf_counter() - self.started
+        logging.info(f"Startup: {name} at {self.marks[name]:.3f}s")
+
+    def report(self, top=20):
+        self.uninstall()
+
+        imports = sorted(
+            (item for item in self.import_times if item[2] <= 1),
+            key=lambda item: item[1],
+            reverse=True
+        )[:top]
+        first_window = self.marks.get('first_window')
+
+        for name, seconds, depth in imports:
+            logging.info(f"Startup import {'  ' * depth}{name}: {seconds:.3f}s")
+
+        if first_window is not None and first_window > STARTUP_BUDGET_SECONDS:
+            logging.warning(
+                f"Startup regression: first window after {first_window:.2f}s, "
+                f"budget {STARTUP_BUDGET_SECONDS:.2f}s"
+            )
+
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'frozen': hasattr(sys, '_MEIPASS'),
+            'budget': STARTUP_BUDGET_SECONDS,
+            'marks': self.marks,
+            'imports': [
+                {'module': name, 'seconds': round(seconds, 4), 'depth': depth}
+                for name, seconds, depth in imports
+            ],
+        }
+        with open(os.path.join(resource_path('logs'), 'startup_profile.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+        return record
@@ -266,6 +266,19 @@ RESULTS_TEXT = """
     }
 """
 
+RESULTS_VIEW = """
+    QListView {
+        background-color: #ffffff;
+        border: 2px solid #e0e0e0;
+        border-radius: 8px;
+        padding: 15px;
+        font-family: 'Segoe UI', 'Helvetica Neue', Arial, sans-serif;
+        font-size: 16px;
+        color: #333333;
+        selection-background-color: #e3f2fd;
+    }
+"""
+
 
 STATUS_LABEL_READY = """
     QLabel {
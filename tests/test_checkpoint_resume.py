@@ -0,0 +1,119 @@
+import os
+from collections import namedtuple
+import pytest
+from checkpoint_journal import CheckpointJournal
+from processing_engine import ProcessingEngine
+from metrics import metrics
+from utils import file_hash
+
+
+Segment = namedtuple('Segment', ['start', 'end', 'text'])
+Info = namedtuple('Info', ['duration'])
+
+
+class StubModel:
+    def __init__(self, text):
+        self.text = text
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append(options)
+        resume_from = options.get('clip_timestamps', [0.0])[0]
+        segments = [Segment(start, start + 10.0, self.text) for start in (0.0, 10.0) if start >= resume_from]
+        return iter(segments), Info(20.0)
+
+
+class StubTranslation:
+    memory = None
+
+
+@pytest.fixture
+def audio_file(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setattr(metrics, 'path', str(tmp_path / 'metrics.jsonl'))
+    path = tmp_path / 'rec.wav'
+    path.write_bytes(b'audio')
+    return str(path)
+
+
+def make_engine(audio_file, model, model_path, finished, language='he', **options):
+    return ProcessingEngine(
+        audio_file, [], model, os.path.dirname(audio_file), StubTranslation(),
+        on_finished=lambda segments, txt_filename: finished.append(txt_filename),
+        language=language, model_path=model_path, **options
+    )
+
+
+def write_interrupted_journal(engine, text):
+    journal = CheckpointJournal(engine.checkpoint_path()).open()
+    journal.write_header(file_hash=file_hash(engine.audio_file), language='he', **engine.checkpoint_settings())
+    journal.append(0.0, 10.0, text, {})
+    journal.close()
+
+
+def test_resumes_with_same_settings(audio_file):
+    finished = []
+    model = StubModel("new")
+    engine = make_engine(audio_file, model, 'small', finished)
+    write_interrupted_journal(engine, "old")
+
+    engine.run()
+
+    assert model.calls[0]['clip_timestamps'] == [10.0]
+    assert [segment[2] for segment in engine.segments] == ["old", "new"]
+
+
+def test_other_model_starts_over(audio_file):
+    finished = []
+    write_interrupted_journal(make_engine(audio_file, StubModel("old"), 'small', []), "old")
+
+    model = StubModel("new")
+    engine = make_engine(audio_file, model, 'medium', finished)
+    engine.run()
+
+    assert 'clip_timestamps' not in model.calls[0]
+    with open(finished[0], encoding='utf-8') as f:
+        assert "old" not in f.read()
+
+
+def test_batch_size_ignored_outside_batched_mode(audio_file):
+    write_interrupted_journal(make_engine(audio_file, StubModel("old"), 'small', [], batch_size=8), "old")
+
+    model = StubModel("new")
+    make_engine(audio_file, model, 'small', [], batch_size=16).run()
+
+    assert model.calls[0]['clip_timestamps'] == [10.0]
+
+
+def test_other_forced_language_starts_over(audio_file):
+    write_interrupted_journal(make_engine(audio_file, StubModel("old"), 'small', []), "old")
+
+    model = StubModel("new")
+    make_engine(audio_file, model, 'small', [], language='ar').run()
+
+    assert 'clip_timestamps' not in model.calls[0]
+    assert model.calls[0]['language'] == 'ar'
+
+
+def test_journal_removed_after_save(audio_file):
+    finished = []
+    engine = make_engine(audio_file, StubModel("text"), 'small', finished)
+    engine.run()
+
+    assert finished and os.path.exists(finished[0])
+    assert not os.path.exists(engine.checkpoint_path())
+
+    model = StubModel("text")
+    make_engine(audio_file, model, 'small', []).run()
+    assert 'clip_timestamps' not in model.calls[0]
+
+
+def test_same_name_files_get_own_journals(tmp_path, audio_file):
+    other = tmp_path / 'other'
+    other.mkdir()
+    other_file = other / 'rec.wav'
+    other_file.write_bytes(b'audio')
+
+    first = make_engine(audio_file, StubModel("a"), 'small', [])
+    second = ProcessingEngine(str(other_file), [], StubModel("b"), str(tmp_path), StubTranslation())
+    assert first.checkpoint_path() != second.checkpoint_path()
@@ -0,0 +1,70 @@
+from collections import namedtuple
+from wav_tail import TailTranscriber
+
+
+Segment = namedtuple('Segment', ['start', 'end', 'text'])
+
+SPEECH = [(0.0, 8.0, "A"), (8.0, 27.0, "B"), (27.0, 33.0, "C"), (33.0, 60.0, "D")]
+
+
+class StubTail:
+    # запись растет, пока модель распознает окно: распознавание медленнее реального времени
+    def __init__(self, path, total, growth):
+        self.path = path
+        self.total = total
+        self.growth = growth
+        self.available = 3.0
+
+    def available_seconds(self):
+        return self.available
+
+    def read(self, start_seconds, end_seconds):
+        return start_seconds, end_seconds
+
+    def grow(self):
+        self.available = min(self.total, self.available + self.growth)
+
+
+class StubModel:
+    def __init__(self, tail):
+        self.tail = tail
+
+    def transcribe(self, audio, **options):
+        window_start, window_end = audio
+        segments = [
+            Segment(max(start, window_start) - window_start, min(end, window_end) - window_start, text)
+            for start, end, text in SPEECH
+            if start < window_end and end > window_start
+        ]
+        self.tail.grow()
+        return iter(segments), None
+
+
+def follow(tmp_path, growth):
+    path = tmp_path / 'rec.wav'
+    path.write_bytes(b'audio')
+    tail = StubTail(str(path), 60.0, growth)
+    transcriber = TailTranscriber(StubModel(tail), tail, poll_interval=0)
+    transcriber.recording_finished = lambda: tail.available >= tail.total
+    segments, _ = transcriber.transcribe(language='he')
+    return list(segments)
+
+
+def test_segments_crossing_commit_margin_are_kept(tmp_path):
+    for growth in (5.0, 15.0, 40.0):
+        segments = follow(tmp_path, growth)
+        assert [segment.text for segment in segments] == ["A", "B", "C", "D"]
+        assert segments[-1].end == 60.0
+
+
+def test_stop_skips_language_detection(tmp_path):
+    path = tmp_path / 'rec.wav'
+    path.write_bytes(b'audio')
+    tail = StubTail(str(path), 60.0, 0.0)
+    transcriber = TailTranscriber(None, tail, is_running=lambda: False)
+
+    class Detector:
+        def detect(self, audio, audio_hash):
+            raise AssertionError("detection after stop")
+
+    assert transcriber.detect_language(Detector()) is None
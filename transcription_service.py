@@ -0,0 +1,420 @@
+import os
+import sys
+import json
+import queue
+import time
+import logging
+import argparse
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from faster_whisper import WhisperModel
+from translation import Translation, TranslationMemory
+from processing_engine import ProcessingEngine
+from audio_cache import AudioCache
+from utils import setup_logging
+import model_registry
+import inference_tuning
+
+
+DEFAULT_PORT = 8765
+JOB_OPTIONS = {'transcribe_mode': str, 'batch_size': int, 'language': str}
+
+
+def is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_job_request(request):
+    # тело запроса приходит от клиента как есть: неверные типы - ошибка 400, а не обрыв соединения
+    if not isinstance(request, dict):
+        raise ValueError("ожидается JSON объект")
+
+    audio_file = request['audio_file']
+    if not isinstance(audio_file, str):
+        raise ValueError("audio_file должен быть строкой")
+
+    target_langs = request.get('target_langs', [])
+    if not isinstance(target_langs, list) or not all(isinstance(lang, str) for lang in target_langs):
+        raise ValueError("target_langs должен быть списком строк")
+
+    save_dir = request.get('save_dir')
+    if save_dir is not None and not isinstance(save_dir, str):
+        raise ValueError("save_dir должен быть строкой")
+
+    priority = request.get('priority', 0)
+    if not is_int(priority):
+        raise ValueError("priority должен быть целым числом")
+
+    options = {}
+    for key, value_type in JOB_OPTIONS.items():
+        value = request.get(key)
+        if value is None:
+            continue
+        if not (is_int(value) if value_type is int else isinstance(value, value_type)):
+            raise ValueError(f"{key} должен быть {'целым числом' if value_type is int else 'строкой'}")
+        options[key] = value
+
+    return audio_file, target_langs, save_dir, priority, options
+
+
+class ServiceJob:
+    def __init__(self, job_id, audio_file, target_langs, save_dir, priority, options):
+        self.id = job_id
+        self.audio_file = audio_file
+        self.target_langs = target_langs
+        self.save_dir = save_dir
+        self.priority = priority
+        self.options = options
+        self.status = 'queued'
+        self.engine = None
+        self.events = []
+        self.released_events = 0
+        self.finished_at = None
+        self.condition = threading.Condition()
+
+    def emit(self, event):
+        with self.condition:
+            self.events.append(event)
+            self.condition.notify_all()
+
+    def finish(self, status, event):
+        with self.condition:
+            self.status = status
+            self.finished_at = time.monotonic()
+            self.events.append(event)
+            self.condition.notify_all()
+
+    def done(self):
+        return self.status in ('finished', 'error', 'cancelled')
+
+    def wait_events(self, index, timeout):
+        # index - номер события с начала задания, с учетом уже освобожденных
+        with self.condition:
+            end = self.released_events + len(self.events)
+            if index >= end and not self.done():
+                self.condition.wait(timeout)
+                end = self.released_events + len(self.events)
+            events = self.events[max(index - self.released_events, 0):]
+            return events, end, self.done()
+
+    def release_events(self):
+        # после выдачи результата клиенту сегменты больше не нужны,
+        # остается только итоговое событие
+        with self.condition:
+            if self.done() and len(self.events) > 1:
+                self.released_events += len(self.events) - 1
+                self.events = self.events[-1:]
+
+    def start(self, engine):
+        with self.condition:
+            if self.status != 'queued':
+                return False
+            self.status = 'running'
+            self.engine = engine
+            return True
+
+    def cancel(self):
+        with self.condition:
+            if self.status == 'queued':
+                self.status = 'cancelled'
+                self.finished_at = time.monotonic()
+                self.events.append({'type': 'cancelled'})
+                self.condition.notify_all()
+            elif self.status == 'running':
+                self.engine.stop()
+
+    def describe(self):
+        return {
+            'id': self.id,
+            'audio_file': self.audio_file,
+            'target_langs': self.target_langs,
+            'priority': self.priority,
+            'status': self.status,
+        }
+
+
+class TranscriptionService:
+    # одна модель распознавания и один кэш переводчиков на машину,
+    # задания выполняются по приоритету не более max_jobs одновременно
+    def __init__(self, transcribe_model, translation, save_dir, max_jobs=1, audio_cache=None, model_path=None,
+                 job_ttl=600, allowed_save_dirs=()):
+        self.transcribe_model = transcribe_model
+        # результаты пишутся от имени сервиса, поэтому только в разрешенные каталоги
+        self.allowed_save_dirs = [os.path.realpath(path) for path in [save_dir, *allowed_save_dirs]]
+        self.model_path = model_path
+        self.job_ttl = job_ttl
+        self.translation = translation
+        self.save_dir = save_dir
+        self.max_jobs = max_jobs
+        self.audio_cache = audio_cache
+        self.jobs = {}
+        self.job_queue = queue.PriorityQueue()
+        self.counter = itertools.count(1)
+        self.lock = threading.Lock()
+        self.workers = []
+
+    def start(self):
+        for i in range(self.max_jobs):
+            worker = threading.Thread(target=self.worker_loop, name=f'service-worker-{i}', daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def prune(self):
+        # завершенные задания хранятся job_ttl секунд, чтобы клиент успел забрать результат
+        now = time.monotonic()
+        with self.lock:
+            expired = [
+                job_id for job_id, job in self.jobs.items()
+                if job.done() and job.finished_at is not None and now - job.finished_at > self.job_ttl
+            ]
+            for job_id in expired:
+                del self.jobs[job_id]
+        if expired:
+            logging.info(f"Dropped {len(expired)} finished jobs")
+
+    def submit(self, audio_file, target_langs, save_dir=None, priority=0, **options):
+        self.prune()
+        with self.lock:
+            job_id = str(next(self.counter))
+            job = ServiceJob(job_id, audio_file, target_langs, save_dir or self.save_dir, priority, options)
+            self.jobs[job_id] = job
+
+        # большее значение priority выполняется раньше, при равенстве - по порядку поступления
+        self.job_queue.put((-priority, int(job_id), job_id))
+        logging.info(f"Job {job_id} queued: {audio_file} (priority {priority})")
+        return job
+
+    def save_dir_allowed(self, save_dir):
+        path = os.path.realpath(save_dir)
+        for allowed in self.allowed_save_dirs:
+            try:
+                if os.path.commonpath([path, allowed]) == allowed:
+                    return True
+            except ValueError:
+                # разные диски в Windows
+                continue
+        return False
+
+    def job(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        self.prune()
+        with self.lock:
+            return [job.describe() for job in self.jobs.values()]
+
+    def cancel(self, job_id):
+        job = self.job(job_id)
+        if job is not None:
+            job.cancel()
+            logging.info(f"Job {job_id} cancelled")
+        return job
+
+    def worker_loop(self):
+        while True:
+            _, _, job_id = self.job_queue.get()
+            job = self.job(job_id)
+            if job is not None:
+                self.run_job(job)
+
+    def run_job(self, job):
+        engine = ProcessingEngine(
+            job.audio_file,
+            job.target_langs,
+            self.transcribe_model,
+            job.save_dir,
+            self.translation,
+            on_progress=lambda message: job.emit({'type': 'progress', 'message': message}),
+            on_segment=lambda start, end, text, translations: job.emit({
+                'type': 'segment', 'start': start, 'end': end, 'text': text, 'translations': translations
+            }),
+            on_finished=lambda segments, txt_filename: job.finish('finished', {
+                'type': 'finished', 'txt_filename': txt_filename, 'language': engine.language
+            }),
+            on_error=lambda message: job.finish('error', {'type': 'error', 'message': message}),
+            transcribe_workers=self.max_jobs,
+            audio_cache=self.audio_cache,
+            model_path=self.model_path,
+            **job.options
+        )
+        if not job.start(engine):
+            return
+
+        logging.info(f"Job {job.id} started: {job.audio_file}")
+        try:
+            engine.run()
+        finally:
+            if not job.done():
+                job.finish('cancelled', {'type': 'cancelled'})
+            logging.info(f"Job {job.id} {job.status}")
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    # POST /jobs, GET /jobs, GET /jobs/<id>/events (NDJSON), DELETE /jobs/<id>
+    EVENT_WAIT = 1.0
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logging.debug(f"Service request: {format % args}")
+
+    def send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def path_parts(self):
+        return [part for part in self.path.split('?')[0].split('/') if part]
+
+    def do_GET(self):
+        parts = self.path_parts()
+        if parts == ['jobs']:
+            return self.send_json(200, {'jobs': self.service.list_jobs()})
+        if len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'events':
+            job = self.service.job(parts[1])
+            if job is None:
+                return self.send_json(404, {'error': f"Нет задания {parts[1]}"})
+            return self.stream_events(job)
+        self.send_json(404, {'error': "Неизвестный адрес"})
+
+    def do_POST(self):
+        if self.path_parts() != ['jobs']:
+            return self.send_json(404, {'error': "Неизвестный адрес"})
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            audio_file, target_langs, save_dir, priority, options = parse_job_request(
+                json.loads(self.rfile.read(length) or b'{}')
+            )
+        except (ValueError, KeyError) as e:
+            return self.send_json(400, {'error': f"Некорректный запрос: {e}"})
+
+        if not os.path.exists(audio_file):
+            return self.send_json(400, {'error': f"Аудио файл недоступен: {audio_file}"})
+
+        if save_dir and not self.service.save_dir_allowed(save_dir):
+            return self.send_json(403, {'error': f"Сервису запрещено сохранять в {save_dir}"})
+
+        job = self.service.submit(
+            audio_file,
+            target_langs,
+            save_dir=save_dir,
+            priority=priority,
+            **options
+        )
+        self.send_json(201, job.describe())
+
+    def do_DELETE(self):
+        parts = self.path_parts()
+        if len(parts) != 2 or parts[0] != 'jobs':
+            return self.send_json(404, {'error': "Неизвестный адрес"})
+
+        job = self.service.cancel(parts[1])
+        if job is None:
+            return self.send_json(404, {'error': f"Нет задания {parts[1]}"})
+        self.send_json(200, job.describe())
+
+    def stream_events(self, job):
+        # события отдаются построчно по мере появления, соединение закрывается
+        # после завершения задания
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        index = 0
+        try:
+            while True:
+                events, index, done = job.wait_events(index, self.EVENT_WAIT)
+                for event in events:
+                    self.wfile.write((json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8'))
+                self.wfile.flush()
+                if done and not events:
+                    job.release_events()
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            logging.info(f"Client disconnected from job {job.id} events")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='tr-tr-service',
+        description="Локальный сервис распознавания речи с общими моделями"
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('-m', '--model', default='faster-whisper-small')
+    parser.add_argument('-o', '--output-dir', default=os.path.join(os.path.expanduser("~"), 'tr-tr'))
+    parser.add_argument(
+        '--max-jobs', type=int, default=1,
+        help="число одновременно выполняемых заданий"
+    )
+    parser.add_argument('--compute-type', choices=['int8', 'int16', 'float32'], default=None)
+    parser.add_argument('--cpu-threads', type=int, default=None)
+    parser.add_argument('--translation-threads', type=int, default=0)
+    parser.add_argument('--translation-budget-mb', type=int, default=2048)
+    parser.add_argument(
+        '--allow-save-dir', action='append', default=[],
+        help="дополнительный каталог, куда клиенты могут просить сохранять результаты"
+    )
+    parser.add_argument(
+        '--job-ttl', type=int, default=600,
+        help="сколько секунд хранить завершенные задания и их результаты"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging()
+
+    model_path = model_registry.resolve_model_path(args.model)
+    if not os.path.exists(model_path):
+        logging.error(f"Transcribe model not found: {model_path}")
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    # одновременные задания выполняются отдельными исполнителями одной модели
+    settings = inference_tuning.resolve_settings(
+        model_path, args.compute_type, args.cpu_threads, num_workers=args.max_jobs
+    )
+    logging.info(f"load_model {model_path} with {settings}...")
+    transcribe_model = WhisperModel(model_size_or_path=model_path, **settings)
+    translation = Translation(
+        model_registry.available_translate_models(),
+        cpu_threads=args.translation_threads,
+        memory=TranslationMemory(),
+        memory_budget_mb=args.translation_budget_mb
+    )
+
+    service = TranscriptionService(
+        transcribe_model, translation, args.output_dir,
+        max_jobs=args.max_jobs, audio_cache=AudioCache(), model_path=model_path, job_ttl=args.job_ttl,
+        allowed_save_dirs=args.allow_save_dir
+    )
+    service.start()
+
+    server = ThreadingHTTPServer((args.host, args.port), ServiceRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    logging.info(f"Transcription service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Transcription service stopped")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
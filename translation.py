@@ -1,18 +1,34 @@
 import os
+import time
+import shutil
+import threading
+import hashlib
 import logging
-from transformers import MarianMTModel, MarianTokenizer
+from collections import Counter, OrderedDict
+from utils import cache_path, open_cache_db
+from metrics import metrics
 
 
 class OpusMt:
     def __init__(self, model_path):
+        from transformers import MarianMTModel, MarianTokenizer
+
         self.tokenizer = MarianTokenizer.from_pretrained(model_path)
         self.model = MarianMTModel.from_pretrained(model_path)
+        self.backend_id = 'pytorch'
+
+    def footprint(self):
+        return sum(
+            tensor.numel() * tensor.element_size()
+            for tensor in list(self.model.parameters()) + list(self.model.buffers())
+        )
 
     def translate(self, texts):
 
-        translated = self.model.generate(
-            **self.tokenizer(texts, return_tensors="pt", padding=True)
-        )
+        with metrics.stage('marian_generate', backend='pytorch', batch=len(texts)):
+            translated = self.model.generate(
+                **self.tokenizer(texts, return_tensors="pt", padding=True)
+            )
 
         return [
             self.tokenizer.decode(t, skip_special_tokens=True)
@@ -20,29 +36,302 @@ class OpusMt:
         ]
 
 
+class OpusMtCt2:
+    def __init__(self, model_path, quantization='int8', cpu_threads=0, beam_size=4):
+        import ctranslate2
+        from transformers import MarianTokenizer
+
+        self.tokenizer = MarianTokenizer.from_pretrained(model_path)
+        self.beam_size = beam_size
+        self.backend_id = f'ctranslate2-{quantization}'
+        self.converted_path = self.converted_model_path(model_path, quantization)
+        self.translator = ctranslate2.Translator(
+            self.converted_path,
+            device='cpu',
+            compute_type=quantization,
+            intra_threads=cpu_threads
+        )
+
+    def footprint(self):
+        # веса загружаются в том же типе, в котором сохранены при конвертации
+        return os.path.getsize(os.path.join(self.converted_path, 'model.bin'))
+
+    @staticmethod
+    def model_hash(model_path):
+        # ключ по путям, размерам и времени изменения файлов: в каталоге лежат
+        # веса pytorch/tf/rust, читать их целиком на каждой загрузке слишком дорого
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(model_path):
+            dirs.sort()
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                relpath = os.path.relpath(os.path.join(root, name), model_path)
+                digest.update(f"{relpath}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def converted_model_path(cls, model_path, quantization):
+        import ctranslate2.converters
+
+        name = os.path.basename(os.path.normpath(model_path))
+        output_dir = os.path.join(
+            cache_path('ct2'),
+            f"{name}-{cls.model_hash(model_path)}-{quantization}"
+        )
+
+        if os.path.exists(os.path.join(output_dir, 'model.bin')):
+            return output_dir
+
+        logging.info(f"Converting {model_path} to CTranslate2 ({quantization})...")
+        tmp_dir = f"{output_dir}.tmp{os.getpid()}"
+        try:
+            ctranslate2.converters.TransformersConverter(model_path).convert(
+                tmp_dir, quantization=quantization, force=True
+            )
+            os.replace(tmp_dir, output_dir)
+        except OSError:
+            # модель уже сконвертирована параллельным процессом
+            if not os.path.exists(os.path.join(output_dir, 'model.bin')):
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        logging.info(f"Converted model cached in {output_dir}")
+        return output_dir
+
+    def translate(self, texts):
+        with metrics.stage('marian_generate', backend='ctranslate2', batch=len(texts)):
+            results = self.translator.translate_batch(
+                [self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(text)) for text in texts],
+                beam_size=self.beam_size
+            )
+
+        return [
+            self.tokenizer.decode(
+                self.tokenizer.convert_tokens_to_ids(result.hypotheses[0]),
+                skip_special_tokens=True
+            )
+            for result in results
+        ]
+
+
+class TranslationMemory:
+    def __init__(self, path=None, max_entries=200000):
+        self.path = path or os.path.join(cache_path('tm'), 'translation_memory.sqlite3')
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.stored_since_eviction = 0
+        self.lock = threading.Lock()
+
+        self.connection = open_cache_db(
+            self.path,
+            "CREATE TABLE IF NOT EXISTS memory ("
+            "model_id TEXT, source TEXT, target TEXT, last_used REAL, "
+            "PRIMARY KEY (model_id, source))",
+            "CREATE INDEX IF NOT EXISTS memory_last_used ON memory (last_used)"
+        )
+
+    @staticmethod
+    def normalize(text):
+        return ' '.join(text.split())
+
+    def stats(self):
+        return self.hits, self.misses
+
+    def lookup(self, model_id, sources):
+        found = {}
+        with self.lock:
+            for source in sources:
+                row = self.connection.execute(
+                    "SELECT target FROM memory WHERE model_id = ? AND source = ?", (model_id, source)
+                ).fetchone()
+                if row is not None:
+                    found[source] = row[0]
+
+            if found:
+                now = time.time()
+                self.connection.executemany(
+                    "UPDATE memory SET last_used = ? WHERE model_id = ? AND source = ?",
+                    [(now, model_id, source) for source in found]
+                )
+
+            self.hits += len(found)
+            self.misses += len(sources) - len(found)
+        return found
+
+    def store(self, model_id, translations):
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO memory (model_id, source, target, last_used) VALUES (?, ?, ?, ?)",
+                [(model_id, source, target, now) for source, target in translations.items()]
+            )
+            self.stored_since_eviction += len(translations)
+            if self.stored_since_eviction >= 1000:
+                self.evict()
+
+    def evict(self):
+        self.stored_since_eviction = 0
+        count = self.connection.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+        if count > self.max_entries:
+            self.connection.execute(
+                "DELETE FROM memory WHERE rowid IN (SELECT rowid FROM memory ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            logging.info(f"Translation memory: evicted {count - self.max_entries} entries")
+
+
+class CachedTranslator:
+    def __init__(self, model, model_id, memory):
+        self.model = model
+        self.model_id = model_id
+        self.memory = memory
+
+    def footprint(self):
+        return self.model.footprint()
+
+    def translate(self, texts, stats=None):
+        sources = [self.memory.normalize(text) for text in texts]
+        unique_sources = list(dict.fromkeys(sources))
+
+        found = self.memory.lookup(self.model_id, unique_sources)
+        missing = [source for source in unique_sources if source not in found]
+        if stats is not None:
+            stats.hits += len(found)
+            stats.misses += len(missing)
+        if missing:
+            translated = dict(zip(missing, self.model.translate(missing)))
+            self.memory.store(self.model_id, translated)
+            found.update(translated)
+
+        return [found[source] for source in sources]
+
+
+class MemoryStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+
+class JobTranslator:
+    # переводчик одного задания: модель и память общие, а попадания
+    # считаются отдельно, чтобы параллельные задания не смешивались в логе
+    def __init__(self, translator, stats):
+        self.translator = translator
+        self.stats = stats
+
+    def footprint(self):
+        return self.translator.footprint()
+
+    def translate(self, texts):
+        return self.translator.translate(texts, stats=self.stats)
+
+
 class Translation:
-    def __init__(self, translate_model_paths):
+    def __init__(self, translate_model_paths, backend='ctranslate2', quantization='int8', cpu_threads=0,
+                 memory=None, memory_budget_mb=2048):
         self.translate_model_paths = translate_model_paths
-        self.translation_models = {}
+        self.translation_models = OrderedDict()
+        self.model_footprints = {}
+        self.pinned = Counter()
+        self.memory_budget = memory_budget_mb * 1024 * 1024 if memory_budget_mb else None
+        self.backend = backend
+        self.quantization = quantization
+        self.cpu_threads = cpu_threads
+        self.memory = memory
+        self.lock = threading.RLock()
 
     def clear_cache(self):
-        self.translation_models.clear()
+        with self.lock:
+            for key in list(self.translation_models):
+                if not self.pinned[key]:
+                    self.unload(key)
+
+    def pin(self, key):
+        with self.lock:
+            self.pinned[key] += 1
+
+    def unpin(self, key):
+        with self.lock:
+            self.pinned[key] -= 1
+            if self.pinned[key] <= 0:
+                del self.pinned[key]
+            self.evict()
+
+    def unload(self, key):
+        del self.translation_models[key]
+        footprint = self.model_footprints.pop(key, 0)
+        logging.info(f"Translation model for {key[0]}-{key[1]} unloaded ({footprint / 2**20:.0f} MB)")
+
+    def loaded_size(self):
+        return sum(self.model_footprints.values())
+
+    def evict(self, keep=None):
+        if self.memory_budget is None:
+            return
+
+        for key in list(self.translation_models):
+            if self.loaded_size() <= self.memory_budget:
+                return
+            if not self.pinned[key] and key != keep:
+                self.unload(key)
 
-    def load_translation_model(self, from_lang, target_lang):
+        if self.loaded_size() > self.memory_budget:
+            logging.warning(
+                f"Pinned and in-use translation models take {self.loaded_size() / 2**20:.0f} MB, "
+                f"over the {self.memory_budget / 2**20:.0f} MB budget"
+            )
+
+    def create_model(self, model_path):
+        model = self.create_backend_model(model_path)
+        if self.memory is not None:
+            return CachedTranslator(model, self.memory_model_id(model_path, model), self.memory)
+        return model
+
+    @staticmethod
+    def memory_model_id(model_path, model):
+        # переводы разных бэкендов, квантований и версий весов не смешиваются
+        name = os.path.basename(os.path.normpath(model_path))
+        return f"{name}:{model.backend_id}:{OpusMtCt2.model_hash(model_path)}"
+
+    def create_backend_model(self, model_path):
+        if self.backend == 'ctranslate2':
+            try:
+                return OpusMtCt2(model_path, quantization=self.quantization, cpu_threads=self.cpu_threads)
+            except Exception as e:
+                logging.warning(f"CTranslate2 backend unavailable for {model_path}, falling back to PyTorch: {e}")
+
+        return OpusMt(model_path)
+
+    def load_translation_model(self, from_lang, target_lang, pin=False):
         key = (from_lang, target_lang)
-        if key in self.translation_models:
-            return self.translation_models[key]
+        with self.lock:
+            if key in self.translation_models:
+                self.translation_models.move_to_end(key)
+                if pin:
+                    self.pinned[key] += 1
+                return self.translation_models[key]
 
-        if key in self.translate_model_paths:
-            model_path = self.translate_model_paths[key]
-            if not os.path.exists(model_path):
-                logging.warning(f"Model path does not exist: {model_path}")
-                return None
+            if key in self.translate_model_paths:
+                model_path = self.translate_model_paths[key]
+                if not os.path.exists(model_path):
+                    logging.warning(f"Model path does not exist: {model_path}")
+                    return None
 
-            self.translation_models[key] = OpusMt(model_path)
+                model = self.create_model(model_path)
+                self.translation_models[key] = model
+                self.model_footprints[key] = model.footprint()
+                if pin:
+                    self.pinned[key] += 1
+                # только что загруженную модель вызывающий код сейчас получит
+                self.evict(keep=key)
 
-            logging.info(f"Translation model for {from_lang}-{target_lang} loaded successfully")
-            return self.translation_models[key]
-        else:
-            logging.warning(f"No translation model available for language: {from_lang}-{target_lang}")
-            return None
+                logging.info(
+                    f"Translation model for {from_lang}-{target_lang} loaded successfully "
+                    f"({self.model_footprints[key] / 2**20:.0f} MB, {self.loaded_size() / 2**20:.0f} MB total)"
+                )
+                return model
+            else:
+                logging.warning(f"No translation model available for language: {from_lang}-{target_lang}")
+                return None
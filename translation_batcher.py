@@ -0,0 +1,131 @@
+import time
+import logging
+
+
+class ChainNode:
+    def __init__(self, model):
+        self.model = model
+        self.chains = []
+        self.children = {}
+
+    def all_chains(self):
+        chains = list(self.chains)
+        for child in self.children.values():
+            chains.extend(child.all_chains())
+        return chains
+
+
+class TranslationBatcher:
+    def __init__(self, translate_model_seq, max_tokens=512, max_wait=2.0):
+        self.translate_model_seq = translate_model_seq
+        self.max_tokens = max_tokens
+        self.max_wait = max_wait
+        self.pending = []
+        self.pending_tokens = 0
+        self.first_pending_time = None
+        self.chain_tree = self.build_chain_tree(translate_model_seq)
+
+    @staticmethod
+    def build_chain_tree(translate_model_seq):
+        # цепочки с общим префиксом (he-en и he-en-ru) делят узлы дерева,
+        # поэтому каждый переход переводится один раз на сегмент
+        tree = {}
+        for langs, model_seq in translate_model_seq.items():
+            langs_seq = langs.split('-')
+            children = tree
+            for i, model in enumerate(model_seq):
+                hop = (langs_seq[i], langs_seq[i + 1])
+                if hop not in children:
+                    children[hop] = ChainNode(model)
+                node = children[hop]
+                children = node.children
+            node.chains.append(langs)
+        return tree
+
+    def translate_tree(self, children, texts, indices, translations):
+        for hop, node in children.items():
+            try:
+                translated = node.model.translate(texts)
+            except Exception as e:
+                logging.error(f"Translation {hop[0]}-{hop[1]} failed: {e}")
+                for langs in node.all_chains():
+                    for i in indices:
+                        translations[i][langs] = "Ошибка перевода"
+                continue
+
+            for langs in node.chains:
+                for i, translated_text in zip(indices, translated):
+                    translations[i][langs] = translated_text
+
+            self.translate_tree(node.children, translated, indices, translations)
+
+    @staticmethod
+    def count_tokens(text):
+        # приблизительная оценка: подслова Marian примерно соответствуют словам
+        return len(text.split()) + 1
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, start, end, text):
+        if not self.pending:
+            self.first_pending_time = time.monotonic()
+        self.pending.append((start, end, text))
+        self.pending_tokens += self.count_tokens(text)
+
+    def is_due(self):
+        if not self.pending:
+            return False
+        if not self.translate_model_seq:
+            return True
+        if self.pending_tokens >= self.max_tokens:
+            return True
+        return time.monotonic() - self.first_pending_time >= self.max_wait
+
+    def flush(self):
+        pending = self.pending
+        self.pending = []
+        self.pending_tokens = 0
+        self.first_pending_time = None
+
+        if not pending:
+            return []
+
+        translations = [
+            {langs: "" for langs in self.translate_model_seq}
+            for _ in pending
+        ]
+        for indices in self.split_batches([text for _, _, text in pending]):
+            texts = [pending[i][2] for i in indices]
+            self.translate_tree(self.chain_tree, texts, indices, translations)
+
+        return [
+            (start, end, text, translations[i])
+            for i, (start, end, text) in enumerate(pending)
+        ]
+
+    def split_batches(self, texts):
+        # пакеты индексов непустых текстов, отсортированных по длине,
+        # так чтобы число токенов с учетом паддинга не превышало max_tokens
+        indices = sorted(
+            (i for i, text in enumerate(texts) if text),
+            key=lambda i: self.count_tokens(texts[i]),
+            reverse=True
+        )
+
+        batches = []
+        batch = []
+        batch_max = 0
+        for i in indices:
+            tokens = self.count_tokens(texts[i])
+            if batch and max(batch_max, tokens) * (len(batch) + 1) > self.max_tokens:
+                batches.append(batch)
+                batch = []
+                batch_max = 0
+            batch.append(i)
+            batch_max = max(batch_max, tokens)
+
+        if batch:
+            batches.append(batch)
+
+        return batches
@@ -0,0 +1,21 @@
+import logging
+from PyQt6.QtCore import QThread
+
+
+class TranslationPreloadThread(QThread):
+    def __init__(self, translation, source_language, target_langs):
+        super().__init__()
+        self.translation = translation
+        self.source_language = source_language
+        self.target_langs = target_langs
+
+    def run(self):
+        for target_lang in self.target_langs:
+            langs_seq = (self.source_language + target_lang).split('-')
+            for left, right in zip(langs_seq, langs_seq[1:]):
+                try:
+                    if self.translation.load_translation_model(left, right) is None:
+                        break
+                except Exception as e:
+                    logging.warning(f"Preloading translation model {left}-{right} failed: {e}")
+                    break
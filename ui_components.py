@@ -0,0 +1,138 @@
+from collections import deque
+from PyQt6.QtWidgets import QVBoxLayout, QSplitter, QWidget, QCheckBox, QLabel, QComboBox, QListView
+from PyQt6.QtCore import Qt, QTimer
+from segment_widget import SegmentDelegate
+from styles import RESULTS_VIEW, SECTION_LABEL, CHECKBOX, LEFT_PANEL
+
+
+# общие части вкладок распознавания одного файла и очереди файлов
+
+AUDIO_FILE_FILTER = "Audio Files (*.mp3 *.wav *.m4a *.ogg *.flac *.mp4);;All Files (*)"
+
+SPEECH_LANGUAGES = [
+    ("Иврит", 'he'),
+    ("Арабский", 'ar'),
+    ("Английский", 'en'),
+    ("Русский", 'ru'),
+]
+
+TRANSCRIBE_MODES = [
+    ("Последовательно", "sequential"),
+    ("Параллельно по паузам", "chunked"),
+    ("Пакетно", "batched"),
+]
+
+FOLLOW_MODE = ("Слежение за записью (WAV)", "follow")
+
+
+def create_panels(widget):
+    main_splitter = QSplitter(Qt.Orientation.Horizontal)
+    tab_layout = QVBoxLayout(widget)
+    tab_layout.addWidget(main_splitter)
+
+    left_panel = QWidget()
+    left_panel.setMaximumWidth(350)
+    left_panel.setStyleSheet(LEFT_PANEL)
+    left_layout = QVBoxLayout(left_panel)
+    left_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+
+    right_panel = QWidget()
+    right_layout = QVBoxLayout(right_panel)
+
+    main_splitter.addWidget(left_panel)
+    main_splitter.addWidget(right_panel)
+    main_splitter.setSizes([300, 900])
+    return left_layout, right_layout
+
+
+def section_label(text):
+    label = QLabel(text)
+    label.setStyleSheet(SECTION_LABEL)
+    return label
+
+
+def create_language_combo():
+    combo = QComboBox()
+    combo.addItem("Определить автоматически", None)
+    for title, language in SPEECH_LANGUAGES:
+        combo.addItem(title, language)
+    return combo
+
+
+def create_mode_combo(follow=False):
+    combo = QComboBox()
+    for title, mode in TRANSCRIBE_MODES + ([FOLLOW_MODE] if follow else []):
+        combo.addItem(title, mode)
+    return combo
+
+
+def create_results_view(model):
+    view = QListView()
+    view.setModel(model)
+    view.setItemDelegate(SegmentDelegate(view))
+    view.setLayoutMode(QListView.LayoutMode.Batched)
+    view.setBatchSize(100)
+    view.setResizeMode(QListView.ResizeMode.Adjust)
+    view.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+    view.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+    view.setStyleSheet(RESULTS_VIEW)
+    return view
+
+
+class TargetLanguageSelector:
+    def __init__(self, layout, on_toggled=None):
+        self.translate_en = QCheckBox("Английский")
+        self.translate_ru = QCheckBox("Русский")
+        self.translate_en_ru = QCheckBox("Русский (с Английского)")
+
+        self.translate_en.setChecked(True)
+
+        for checkbox in self.checkboxes():
+            checkbox.setStyleSheet(CHECKBOX)
+            if on_toggled is not None:
+                checkbox.toggled.connect(on_toggled)
+            layout.addWidget(checkbox)
+
+    def checkboxes(self):
+        return [self.translate_en, self.translate_ru, self.translate_en_ru]
+
+    def setEnabled(self, enabled):
+        for checkbox in self.checkboxes():
+            checkbox.setEnabled(enabled)
+
+    def selected(self):
+        target_langs = []
+        if self.translate_en.isChecked():
+            target_langs.append("-en")
+        if self.translate_ru.isChecked():
+            target_langs.append("-ru")
+        if self.translate_en_ru.isChecked():
+            target_langs.append("-en-ru")
+        return target_langs
+
+
+class SegmentBuffer:
+    # сегменты, пришедшие между кадрами, передаются в модель одной вставкой
+    FLUSH_INTERVAL_MS = 16
+
+    def __init__(self, parent, on_flush):
+        self.on_flush = on_flush
+        self.segments = deque()
+        self.timer = QTimer(parent)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self.timer.timeout.connect(self.flush)
+
+    def append(self, start, end, text, translations):
+        self.segments.append((start, end, text, translations))
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        self.timer.stop()
+        segments, self.segments = self.segments, deque()
+        self.on_flush(list(segments))
+
+    def discard(self):
+        self.timer.stop()
+        self.segments.clear()
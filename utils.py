@@ -1,5 +1,9 @@
 import os
 import sys
+import logging
+import sqlite3
+import hashlib
+from datetime import datetime
 from functools import lru_cache
 
 
@@ -14,6 +18,13 @@ def format_seconds(seconds):
         return f"{m:02d}:{s:02d}"
 
 
+def format_segment(start, end, text, translations):
+    lines = [f"[{format_seconds(start)} - {format_seconds(end)}", text]
+    lines.extend(f"({target_lang}) {text_t}" for target_lang, text_t in translations.items())
+    lines.append("-" * 40)
+    return "\n".join(lines) + "\n"
+
+
 @lru_cache
 def resource_path(relative_path=''):
     if hasattr(sys,'_MEIPASS'):
@@ -21,4 +32,90 @@ def resource_path(relative_path=''):
     else:
         base_path = os.path.abspath(".")
 
-    return os.path.join(base_path, relative_path) if relative_path else base_path
\ No newline at end of file
+    return os.path.join(base_path, relative_path) if relative_path else base_path
+
+
+def cache_path(relative_path=''):
+    path = os.path.join(os.path.expanduser("~"), 'tr-tr', '.cache', relative_path)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def open_cache_db(path, *schema):
+    # WAL и таймаут ожидания позволяют нескольким потокам и процессам писать в одну базу
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    for statement in schema:
+        connection.execute(statement)
+    return connection
+
+
+def setup_logging():
+    log_file = f'{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.log'
+    logs_path = resource_path('logs')
+
+    if not os.path.exists(logs_path):
+        os.makedirs(logs_path)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='[%(asctime)s] - [%(name)s] - [%(levelname)s] - %(message)s',
+        filename=os.path.join(logs_path, log_file),
+        filemode='a'
+    )
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(logging.Formatter('[%(asctime)s] - [%(name)s] - [%(levelname)s] - %(message)s'))
+    logging.getLogger().addHandler(console_handler)
+
+
+def file_hash(path):
+    stat = os.stat(path)
+    return _file_hash(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=256)
+def _file_hash(path, size, mtime_ns):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def peak_rss():
+    # пиковый объем резидентной памяти процесса в байтах, None если недоступно
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        pass
+
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD),
+                ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+        )
+        return counters.PeakWorkingSetSize
+    except (ImportError, AttributeError, OSError):
+        return None
@@ -0,0 +1,183 @@
+import os
+import time
+import struct
+import logging
+from chunked_transcriber import ChunkSegment, ChunkedTranscriptionInfo, SAMPLE_RATE
+
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavTail:
+    # чтение WAV, который еще записывается: размер данных в заголовке
+    # не обновлен, поэтому доступный объем считается по размеру файла
+    def __init__(self, path):
+        self.path = path
+        self.data_offset = None
+        self.parse_header()
+
+    def parse_header(self):
+        with open(self.path, 'rb') as f:
+            riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+            if riff not in (b'RIFF', b'RF64') or wave != b'WAVE':
+                raise ValueError(f"Не WAV файл: {self.path}")
+
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError(f"В WAV файле нет данных: {self.path}")
+                chunk_id, chunk_size = struct.unpack('<4sI', header)
+
+                if chunk_id == b'fmt ':
+                    fmt = f.read(chunk_size)
+                    self.format_tag, self.channels, self.sample_rate = struct.unpack('<HHI', fmt[:8])
+                    self.block_align, self.bits_per_sample = struct.unpack('<HH', fmt[12:16])
+                    if self.format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+                        self.format_tag = struct.unpack('<H', fmt[24:26])[0]
+                    f.seek(chunk_size % 2, os.SEEK_CUR)
+                elif chunk_id == b'data':
+                    self.data_offset = f.tell()
+                    break
+                else:
+                    f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+        supported = {(WAVE_FORMAT_PCM, 16), (WAVE_FORMAT_PCM, 32), (WAVE_FORMAT_IEEE_FLOAT, 32)}
+        if (self.format_tag, self.bits_per_sample) not in supported:
+            raise ValueError(
+                f"Формат WAV не поддерживается для слежения: {self.format_tag}/{self.bits_per_sample} бит"
+            )
+
+    def available_seconds(self):
+        frames = (os.path.getsize(self.path) - self.data_offset) // self.block_align
+        return max(frames, 0) / self.sample_rate
+
+    def read(self, start_seconds, end_seconds):
+        import numpy as np
+
+        start_frame = int(start_seconds * self.sample_rate)
+        end_frame = int(end_seconds * self.sample_rate)
+        with open(self.path, 'rb') as f:
+            f.seek(self.data_offset + start_frame * self.block_align)
+            data = f.read(max(end_frame - start_frame, 0) * self.block_align)
+        data = data[:len(data) // self.block_align * self.block_align]
+
+        if self.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+            samples = np.frombuffer(data, dtype='<f4')
+        elif self.bits_per_sample == 16:
+            samples = np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768.0
+        else:
+            samples = np.frombuffer(data, dtype='<i4').astype(np.float32) / 2147483648.0
+
+        samples = samples.reshape(-1, self.channels).mean(axis=1)
+        if self.sample_rate != SAMPLE_RATE and len(samples):
+            positions = np.arange(0, len(samples), self.sample_rate / SAMPLE_RATE)
+            samples = np.interp(positions, np.arange(len(samples)), samples)
+        return samples.astype(np.float32)
+
+
+class TailTranscriber:
+    def __init__(self, transcribe_model, wav_tail, is_running=lambda: True,
+                 window_seconds=20, lookback_seconds=5, commit_margin_seconds=2,
+                 min_new_seconds=2, poll_interval=0.5, idle_timeout=15):
+        self.transcribe_model = transcribe_model
+        self.wav_tail = wav_tail
+        self.is_running = is_running
+        self.window_seconds = window_seconds
+        self.lookback_seconds = lookback_seconds
+        self.commit_margin_seconds = commit_margin_seconds
+        self.min_new_seconds = min_new_seconds
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.committed_until = 0.0
+        self.transcribed_until = 0.0
+        self.window_extension = 0.0
+        self.last_size = -1
+        self.last_growth = time.monotonic()
+
+    def recording_finished(self):
+        size = os.path.getsize(self.wav_tail.path)
+        if size != self.last_size:
+            self.last_size = size
+            self.last_growth = time.monotonic()
+            return False
+        return time.monotonic() - self.last_growth >= self.idle_timeout
+
+    def wait_for_audio(self, seconds):
+        while self.is_running():
+            available = self.wav_tail.available_seconds()
+            finished = self.recording_finished()
+            if available >= seconds or finished:
+                return available, finished
+            time.sleep(self.poll_interval)
+        return self.wav_tail.available_seconds(), True
+
+    def detect_language(self, language_detector, prefix_seconds=5):
+        # короткий префикс: текст должен появляться через несколько секунд после начала речи
+        available, _ = self.wait_for_audio(prefix_seconds)
+        if not self.is_running():
+            return None
+        return language_detector.detect(self.wav_tail.read(0, min(available, prefix_seconds)), None)
+
+    def transcribe(self, language=None, **options):
+        options.pop('clip_timestamps', None)
+        options.setdefault('condition_on_previous_text', False)
+        info = ChunkedTranscriptionInfo(language, 1.0, self.wav_tail.available_seconds())
+        return self.follow(language, options), info
+
+    def follow(self, language, options):
+        previous_text = ""
+        while self.is_running():
+            # новое окно только после прихода новых данных, иначе повторяли бы то же самое
+            available, finished = self.wait_for_audio(
+                max(self.committed_until, self.transcribed_until) + self.min_new_seconds
+            )
+            if not self.is_running():
+                return
+
+            # окно начинается чуть раньше зафиксированной границы, чтобы слово
+            # на стыке было распознано целиком
+            window_start = max(0.0, self.committed_until - self.lookback_seconds)
+            window_size = self.lookback_seconds + self.window_seconds + self.window_extension
+            window_end = min(available, window_start + window_size)
+            window_full = window_end - window_start >= window_size
+            final_pass = finished and window_end >= available
+            commit_limit = window_end if final_pass else window_end - self.commit_margin_seconds
+
+            audio = self.wav_tail.read(window_start, window_end)
+            self.transcribed_until = window_end
+            segments, _ = self.transcribe_model.transcribe(
+                audio, language=language, initial_prompt=previous_text or None, **options
+            )
+
+            has_new_segments = False
+            crossing_start = None
+            for segment in segments:
+                start, end = segment.start + window_start, segment.end + window_start
+                # сегменты из области перекрытия уже выданы в прошлых окнах
+                if end <= self.committed_until + 0.1 or (start + end) / 2 < self.committed_until:
+                    continue
+                has_new_segments = True
+                if end > commit_limit:
+                    crossing_start = start
+                    break
+                self.committed_until = end
+                self.window_extension = 0.0
+                previous_text = segment.text
+                yield ChunkSegment(start, end, segment.text)
+
+            if crossing_start is not None and crossing_start > self.committed_until + 0.1:
+                # до начала незаконченного сегмента речи нет, следующее окно начнется с него
+                self.committed_until = crossing_start
+                self.window_extension = 0.0
+            elif crossing_start is not None and window_full:
+                # сегмент длиннее окна: расширяем окно, пока он не поместится целиком
+                self.window_extension += self.window_seconds
+            elif not has_new_segments and window_full:
+                # в заполненном окне нет новой речи - тишина, сдвигаем границу
+                self.committed_until = max(self.committed_until, commit_limit)
+
+            if final_pass:
+                logging.info(f"Recording {self.wav_tail.path} finished at {available:.1f}s")
+                return